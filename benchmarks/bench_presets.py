@@ -0,0 +1,54 @@
+"""
+Measures how long it takes to load every preset in the presets directory, cold and warm,
+with the pure Python YAML loader and with libyaml when it is available.
+
+Usage: python -m benchmarks.bench_presets [rounds]
+"""
+import sys
+import time
+
+import yaml
+
+from config import PRESETS_DIR
+from utilities.preset_registry import PresetRegistry
+
+
+def load_all(registry):
+    """
+    Loads every preset once.
+
+    :param registry: PresetRegistry to load through.
+    :return: Elapsed time in seconds.
+    """
+    started = time.perf_counter()
+    for name in registry.names():
+        registry.load(name)
+    return time.perf_counter() - started
+
+
+def run_loader(loader, rounds):
+    """
+    Times a cold load through a new registry, then warm loads through the same one.
+
+    :param loader: PyYAML loader class.
+    :param rounds: Number of warm rounds to average.
+    :return: Tuple of (cold seconds, average warm seconds).
+    """
+    registry = PresetRegistry(PRESETS_DIR, loader=loader)
+    cold = load_all(registry)
+    warm = sum(load_all(registry) for _ in range(rounds)) / rounds
+    return cold, warm
+
+
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    loaders = [("SafeLoader", yaml.SafeLoader)]
+    if hasattr(yaml, 'CSafeLoader'):
+        loaders.append(("CSafeLoader", yaml.CSafeLoader))
+    else:
+        print("PyYAML was built without libyaml, CSafeLoader is unavailable")
+
+    print(f"{len(PresetRegistry(PRESETS_DIR).names())} presets in {PRESETS_DIR}, {rounds} warm rounds")
+    for name, loader in loaders:
+        cold, warm = run_loader(loader, rounds)
+        print(f"{name:>12}: cold {cold * 1000:8.1f} ms   warm {warm * 1000:8.2f} ms")
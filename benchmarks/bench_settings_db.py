@@ -0,0 +1,82 @@
+"""
+Measures settings reads and writes per second against SQLite under concurrent threads,
+for each engine profile in database/session.py.
+
+Usage: python -m benchmarks.bench_settings_db [threads] [seconds]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from database.models import Configuration
+from database.session import ENGINE_PROFILES, Base, create_database_engine
+
+
+def run_profile(profile, threads, seconds, writers):
+    """
+    Runs reader and writer threads against a fresh database for a fixed time.
+
+    :param profile: Engine profile name.
+    :param threads: Total number of threads.
+    :param seconds: How long to run.
+    :param writers: How many of the threads write instead of read.
+    :return: Tuple of (reads per second, writes per second, errors).
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        engine = create_database_engine(os.path.join(temp_dir, 'bench.db'), profile)
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as session:
+            session.add(Configuration(download_dir=temp_dir, msu_master_dir=temp_dir, dark_mode=0, auto_run=0))
+            session.commit()
+
+        counts = {"reads": 0, "writes": 0, "errors": 0}
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def reader():
+            done = 0
+            while not stop.is_set():
+                with Session() as session:
+                    session.query(Configuration).first().download_dir
+                done += 1
+            with lock:
+                counts["reads"] += done
+
+        def writer():
+            done = errors = 0
+            while not stop.is_set():
+                try:
+                    with Session() as session:
+                        session.query(Configuration).first().dark_mode = done % 2
+                        session.commit()
+                    done += 1
+                except Exception:
+                    errors += 1
+            with lock:
+                counts["writes"] += done
+                counts["errors"] += errors
+
+        workers = [threading.Thread(target=writer if i < writers else reader) for i in range(threads)]
+        for worker in workers:
+            worker.start()
+        time.sleep(seconds)
+        stop.set()
+        for worker in workers:
+            worker.join()
+        engine.dispose()
+
+    return counts["reads"] / seconds, counts["writes"] / seconds, counts["errors"]
+
+
+if __name__ == "__main__":
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 3
+    print(f"{threads} threads ({max(1, threads // 4)} writing), {seconds}s per profile")
+    for profile in ENGINE_PROFILES:
+        reads, writes, errors = run_profile(profile, threads, seconds, max(1, threads // 4))
+        print(f"{profile:>8}: {reads:10.0f} reads/s {writes:8.0f} writes/s {errors:4d} errors")
@@ -15,7 +15,7 @@ import sys
 # ├── utilities
 
 def read_log_level():
-    log_level_path = os.path.join(EXE_DIR, 'log_level.txt')
+    log_level_path = LOG_LEVEL_PATH
     try:
         with open(log_level_path, 'r') as file:
             for line in file:
@@ -69,14 +69,65 @@ GOOGLE_SCOPES = ['https://www.googleapis.com/auth/drive.readonly',
                  ]
 FETCH_TIMEOUT_IN_SECONDS = 6 * 60 * 60 # 6 hours
 
+# Download Configurations
+MAX_CONCURRENT_DOWNLOADS = 4
+MAX_CONCURRENT_EXTRACTIONS = 2
+EXTRACT_QUEUE_SIZE = 4 # Downloaded archives waiting for an extraction worker
+DRIVE_CHUNK_SIZE = 8 * 1024 * 1024 # 8 MB per ranged request
+DRIVE_MAX_CHUNK_SIZE = 64 * 1024 * 1024 # Upper bound for adaptive chunking
+DRIVE_ADAPTIVE_CHUNKING = True
+PROGRESS_UPDATE_INTERVAL_SECONDS = 0.1 # At most 10 progress updates per second
+DRIVE_DOWNLOAD_SEGMENTS = 4 # Parallel connections per file, 1 disables segmented downloads
+# Extract .zip packs while they download instead of saving the archive first. Saves disk space
+# and time, but a streamed pack cannot resume after a restart and is downloaded again from the start.
+STREAM_EXTRACT_ZIP = False
+HTTP_POOL_MAX_IDLE = MAX_CONCURRENT_DOWNLOADS * DRIVE_DOWNLOAD_SEGMENTS # Idle keep-alive clients kept for reuse
+DOWNLOAD_MAX_RETRIES = 3
+DOWNLOAD_RETRY_BACKOFF_SECONDS = 2
+
+# Extraction Configurations
+EXTRACTION_WORKERS = None # None uses one process per CPU core
+EXTRACTION_MEMORY_BUDGET = 2 * 1024 * 1024 * 1024 # 2 GB shared by all extraction processes
+
+# File System Watcher
+FS_WATCH_POLL_INTERVAL_SECONDS = 2 # Used when inotify is not available
+
+# Connectivity Monitor
+CONNECTIVITY_PROBE_HOST = 'www.google.com'
+CONNECTIVITY_PROBE_PORT = 80
+CONNECTIVITY_PROBE_TIMEOUT_SECONDS = 2
+CONNECTIVITY_CHECK_INTERVAL_SECONDS = 30 # Between probes while online
+CONNECTIVITY_RETRY_MIN_SECONDS = 2 # First retry while offline, doubled up to the maximum
+CONNECTIVITY_RETRY_MAX_SECONDS = 60
+CONNECTIVITY_POLL_INTERVAL_MS = 500 # How often the GUI checks for connectivity changes
+
 # URLs and Web Endpoints
 ALTTPR_WEBSITE_URL = 'https://alttpr.com/en'
+ALTTPR_BASE_URL = 'https://alttpr.com' # Randomizer API host used by pyz3r
 MSU_SHEET_ID = '1XRkR4Xy6S24UzYkYBAOv-VYWPKZIoUKgX04RbjF128Q'
 
+# Seed Generation
+SEED_RESULT_POLL_INTERVAL_MS = 100 # How often the GUI checks for finished seed requests
+SEED_BATCH_CONCURRENCY = 3 # Seeds generated at the same time in a batch
+SEED_BATCH_MIN_INTERVAL_SECONDS = 1.0 # Minimum time between two generate requests
+SEED_BATCH_MAX_RETRIES = 3
+SEED_BATCH_RETRY_BACKOFF_SECONDS = 2
+
+# Database Configuration
+DATABASE_PROFILE = 'tuned' # See ENGINE_PROFILES in database/session.py
+
 # App Configuration
 APP_WIDTH = 520
 APP_HEIGHT = 400 # nice
 BUTTON_WIDTH = 10
+LAZY_FRAMES = True # Build each screen on first visit; False builds them all at startup
+UI_EVENT_POLL_INTERVAL_MS = 100 # How often screens pick up results handed over by background threads
 
 # Log Level
+LOG_LEVEL_PATH = os.path.join(EXE_DIR, 'log_level.txt')
 LOG_LEVEL = read_log_level()
+LOG_FILE_PATH = os.path.join(EXE_DIR, 'log_file.log')
+LOG_MAX_BYTES = 5 * 1024 * 1024 # Rotate log_file.log at 5 MB
+LOG_BACKUP_COUNT = 3 # Rotated logs kept as log_file.log.1 to .3
+LOG_RATE_LIMIT_SECONDS = 1 # Minimum time between two rate-limited messages from the same line
+LOG_LEVEL_CHECK_INTERVAL_MS = 5000 # How often log_level.txt is checked for changes
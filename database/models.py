@@ -1,5 +1,5 @@
 from database.session import Base
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Float, Integer, String, Text, UniqueConstraint
 
 class Configuration(Base):
     __tablename__ = 'configurations'
@@ -10,4 +10,24 @@ class Configuration(Base):
     tracker_path = Column(String, nullable=True)
     dark_mode = Column(Integer, default=0)
     auto_run = Column(Integer, default=0)
-    sfc_file = Column(String, nullable=True)
\ No newline at end of file
+    sfc_file = Column(String, nullable=True)
+
+class MsuPack(Base):
+    __tablename__ = 'msu_packs'
+    __table_args__ = (UniqueConstraint('master_dir', 'name'),)
+
+    id = Column(Integer, primary_key=True)
+    master_dir = Column(String, nullable=False)
+    name = Column(String, nullable=False)
+    naming_convention = Column(String, nullable=True)
+    track_count = Column(Integer, default=0)
+    total_size = Column(Integer, default=0)
+    mtime = Column(Float, nullable=False)
+
+
+class CatalogCache(Base):
+    __tablename__ = 'catalog_cache'
+
+    id = Column(Integer, primary_key=True)
+    fetched_at = Column(Float, nullable=False)
+    payload = Column(Text, nullable=False)
@@ -1,15 +1,80 @@
+import json
 import os
 import logging
+import threading
 
 from config import BASE_DIR
-from database.models import Configuration
-from database.session import managed_session 
+from database.models import CatalogCache, Configuration, MsuPack
+from database.session import managed_session, read_session
 
-def get_user_settings():
+class UserSettings:
+    """
+    Read-only snapshot of the user settings. Supports both attribute access and the
+    dictionary-style access (settings['dark_mode'], settings.get('sfc_file')) callers already use.
     """
-    Retrieve user settings from the database.
+    FIELDS = ("download_dir", "msu_master_dir", "tracker_path", "dark_mode", "auto_run", "sfc_file")
+
+    __slots__ = FIELDS
+
+    def __init__(self, download_dir, msu_master_dir, tracker_path=None, dark_mode=0, auto_run=0, sfc_file=None):
+        self.download_dir = download_dir
+        self.msu_master_dir = msu_master_dir
+        self.tracker_path = tracker_path
+        self.dark_mode = dark_mode
+        self.auto_run = auto_run
+        self.sfc_file = sfc_file
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in self.FIELDS else default
+
+    def replace(self, **changes):
+        """
+        Returns a copy with the given fields changed.
+        """
+        values = self.to_dict()
+        values.update(changes)
+        return UserSettings(**values)
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
 
-    :return: A dictionary of user settings.
+_settings_lock = threading.RLock()
+_settings_cache = None
+_settings_version = 0
+
+def _set_settings_cache(settings):
+    global _settings_cache, _settings_version
+    with _settings_lock:
+        _settings_cache = settings
+        _settings_version += 1
+
+def invalidate_settings_cache():
+    """
+    Drop the cached user settings so the next read goes to the database, e.g. after the
+    database was changed outside of this module.
+    """
+    _set_settings_cache(None)
+    logging.info("User settings cache invalidated")
+
+def get_settings_version():
+    """
+    Return a counter that increases whenever the cached user settings change.
+
+    :return: Settings version.
+    """
+    return _settings_version
+
+def _load_user_settings():
+    """
+    Read user settings from the database.
+
+    :return: UserSettings, or None if no settings have been saved yet.
     """
     with managed_session() as session:
         settings = session.query(Configuration).first()
@@ -26,25 +91,35 @@ def get_user_settings():
                 os.makedirs(settings.msu_master_dir, exist_ok=True)
                 
             logging.info("User settings retrieved from database")
-            return {
-                "download_dir": settings.download_dir,
-                "msu_master_dir": settings.msu_master_dir,
-                "tracker_path": settings.tracker_path,
-                "dark_mode": settings.dark_mode,
-                "auto_run": settings.auto_run,
-                "sfc_file": settings.sfc_file
-            }
-        else:
-            logging.warning("No user settings found in database, returning default values")
-            default_path = os.path.join(BASE_DIR, "CHANGEME")
-            return {
-                "download_dir": default_path,
-                "msu_master_dir": default_path,
-                "tracker_path": None,
-                "dark_mode": 0,
-                "auto_run": 0,
-                "sfc_file": None
-            }
+            return UserSettings(
+                download_dir=settings.download_dir,
+                msu_master_dir=settings.msu_master_dir,
+                tracker_path=settings.tracker_path,
+                dark_mode=settings.dark_mode,
+                auto_run=settings.auto_run,
+                sfc_file=settings.sfc_file
+            )
+        return None
+
+def get_user_settings():
+    """
+    Retrieve user settings, reading the database only on the first call or after the
+    cache was invalidated. Saving settings through this module keeps the cache current.
+
+    :return: UserSettings, which can also be read like a dictionary.
+    """
+    with _settings_lock:
+        if _settings_cache is not None:
+            return _settings_cache
+
+        settings = _load_user_settings()
+        if settings:
+            _set_settings_cache(settings)
+            return settings
+
+    logging.warning("No user settings found in database, returning default values")
+    default_path = os.path.join(BASE_DIR, "CHANGEME")
+    return UserSettings(download_dir=default_path, msu_master_dir=default_path)
 
 def save_settings_to_db(download_path, msu_master_path, tracker_path, dark_mode_var, auto_run_var):
     """
@@ -56,20 +131,27 @@ def save_settings_to_db(download_path, msu_master_path, tracker_path, dark_mode_
     :param dark_mode_var: Dark mode setting.
     :param auto_run_var: Auto-run setting.
     """
-    with managed_session() as session:
-        settings = session.query(Configuration).first()
+    # Hold the cache lock across the write so readers never see a cache older than the database
+    with _settings_lock:
+        with managed_session() as session:
+            settings = session.query(Configuration).first()
+
+            if not settings:
+                settings = Configuration(download_dir=download_path, msu_master_dir=msu_master_path, tracker_path=tracker_path, dark_mode=dark_mode_var, auto_run=auto_run_var)
+                session.add(settings)
+                logging.info("New user settings saved to database")
+            else:
+                settings.download_dir = download_path
+                settings.msu_master_dir = msu_master_path
+                settings.tracker_path = tracker_path
+                settings.dark_mode = dark_mode_var
+                settings.auto_run = auto_run_var
+                logging.info("User settings updated in database")
 
-        if not settings:
-            settings = Configuration(download_dir=download_path, msu_master_dir=msu_master_path, tracker_path=tracker_path, dark_mode=dark_mode_var, auto_run=auto_run_var)
-            session.add(settings)
-            logging.info("New user settings saved to database")
-        else:
-            settings.download_dir = download_path
-            settings.msu_master_dir = msu_master_path
-            settings.tracker_path = tracker_path
-            settings.dark_mode = dark_mode_var
-            settings.auto_run = auto_run_var
-            logging.info("User settings updated in database")
+            sfc_file = settings.sfc_file
+
+        # Only reached once the commit succeeded
+        _set_settings_cache(UserSettings(download_path, msu_master_path, tracker_path, dark_mode_var, auto_run_var, sfc_file))
 
 def save_sfc_selection_to_db(selected_sfc):
     """
@@ -77,16 +159,22 @@ def save_sfc_selection_to_db(selected_sfc):
 
     :param selected_sfc: The selected SFC file.
     """
-    with managed_session() as session:
-        settings = session.query(Configuration).first()
+    with _settings_lock:
+        with managed_session() as session:
+            settings = session.query(Configuration).first()
+
+            if selected_sfc:
+                full_sfc_path = os.path.join(settings.download_dir, selected_sfc)
+                settings.sfc_file = full_sfc_path
+                logging.info(f"SFC file selection saved to database: {full_sfc_path}")
+            else:
+                settings.sfc_file = ""
+                logging.info("SFC file selection cleared in database")
+
+            sfc_file = settings.sfc_file
 
-        if selected_sfc:
-            full_sfc_path = os.path.join(settings.download_dir, selected_sfc)
-            settings.sfc_file = full_sfc_path
-            logging.info(f"SFC file selection saved to database: {full_sfc_path}")
-        else:
-            settings.sfc_file = ""
-            logging.info("SFC file selection cleared in database")
+        if _settings_cache is not None:
+            _set_settings_cache(_settings_cache.replace(sfc_file=sfc_file))
 
 def get_selected_sfc():
     """
@@ -100,3 +188,106 @@ def get_selected_sfc():
         return user_settings.get("sfc_file")
     else:
         logging.warning("No selected SFC file found in user settings")
+
+def _msu_pack_to_dict(pack):
+    return {
+        "name": pack.name,
+        "naming_convention": pack.naming_convention,
+        "track_count": pack.track_count,
+        "total_size": pack.total_size,
+        "mtime": pack.mtime
+    }
+
+def get_msu_pack_index(msu_master_dir):
+    """
+    Retrieve the indexed MSU packs for an MSU master directory.
+
+    :param msu_master_dir: Path to the MSU master directory.
+    :return: Dictionary of pack name to pack details.
+    """
+    with read_session() as session:
+        packs = session.query(MsuPack).filter_by(master_dir=msu_master_dir).all()
+        return {pack.name: _msu_pack_to_dict(pack) for pack in packs}
+
+def get_msu_pack(msu_master_dir, name):
+    """
+    Retrieve the indexed details of a single MSU pack.
+
+    :param msu_master_dir: Path to the MSU master directory.
+    :param name: Name of the pack folder.
+    :return: Dictionary of pack details, or None if the pack is not indexed.
+    """
+    with read_session() as session:
+        pack = session.query(MsuPack).filter_by(master_dir=msu_master_dir, name=name).first()
+        return _msu_pack_to_dict(pack) if pack else None
+
+def save_msu_pack_index(msu_master_dir, updated_packs, removed_names):
+    """
+    Apply changes to the MSU pack index.
+
+    :param msu_master_dir: Path to the MSU master directory.
+    :param updated_packs: List of pack detail dictionaries to insert or update.
+    :param removed_names: Names of packs that no longer exist.
+    """
+    with managed_session() as session:
+        if removed_names:
+            session.query(MsuPack).filter(MsuPack.master_dir == msu_master_dir, MsuPack.name.in_(removed_names)).delete(synchronize_session=False)
+
+        existing = {}
+        if updated_packs:
+            names = [pack["name"] for pack in updated_packs]
+            existing = {pack.name: pack for pack in session.query(MsuPack).filter(MsuPack.master_dir == msu_master_dir, MsuPack.name.in_(names))}
+
+        for details in updated_packs:
+            pack = existing.get(details["name"])
+            if not pack:
+                pack = MsuPack(master_dir=msu_master_dir, name=details["name"])
+                session.add(pack)
+            pack.naming_convention = details["naming_convention"]
+            pack.track_count = details["track_count"]
+            pack.total_size = details["total_size"]
+            pack.mtime = details["mtime"]
+        logging.info(f"MSU pack index updated: {len(updated_packs)} changed, {len(removed_names)} removed")
+
+def get_catalog_cache():
+    """
+    Retrieve the locally cached MSU catalog.
+
+    :return: Tuple of (fetch timestamp, payload dictionary), or None if nothing is cached.
+    """
+    with read_session() as session:
+        cache = session.query(CatalogCache).first()
+        if not cache:
+            return None
+        try:
+            return cache.fetched_at, json.loads(cache.payload)
+        except ValueError as e:
+            logging.error(f"Cached MSU catalog is corrupt, ignoring it: {e}")
+            return None
+
+def save_catalog_cache(fetched_at, payload):
+    """
+    Save the MSU catalog locally, replacing any previous copy.
+
+    :param fetched_at: Time the catalog was fetched.
+    :param payload: JSON-serializable catalog data.
+    """
+    with managed_session() as session:
+        cache = session.query(CatalogCache).first()
+        if not cache:
+            cache = CatalogCache()
+            session.add(cache)
+        cache.fetched_at = fetched_at
+        cache.payload = json.dumps(payload, separators=(',', ':'))
+        logging.info("MSU catalog saved to database")
+
+def touch_catalog_cache(fetched_at):
+    """
+    Update the fetch timestamp of the cached MSU catalog without rewriting it.
+
+    :param fetched_at: Time the catalog was last confirmed to be current.
+    """
+    with managed_session() as session:
+        cache = session.query(CatalogCache).first()
+        if cache:
+            cache.fetched_at = fetched_at
@@ -1,14 +1,60 @@
 import os
 
-from config import BASE_DIR
+from config import BASE_DIR, DATABASE_PROFILE
 
 from contextlib import contextmanager
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
+
+# SQLite engine profiles. 'default' is the stock create_engine with SQLite's rollback journal;
+# 'tuned' uses WAL so readers on other threads are not blocked by a writer, relaxes fsyncs to
+# once per checkpoint and waits for locks instead of failing with "database is locked".
+ENGINE_PROFILES = {
+    'default': {
+        'pragmas': {},
+        'engine_args': {}
+    },
+    'tuned': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': 5000
+        },
+        'engine_args': {
+            # Connections are handed between the GUI thread and download workers by the pool
+            'connect_args': {'check_same_thread': False, 'timeout': 5},
+            'poolclass': QueuePool,
+            'pool_size': 8,
+            'max_overflow': 8
+        }
+    }
+}
+
+def create_database_engine(path, profile=DATABASE_PROFILE):
+    """
+    Create a SQLAlchemy engine for a SQLite database using one of the ENGINE_PROFILES.
+
+    :param path: Path to the SQLite database file.
+    :param profile: Name of the engine profile.
+    :return: SQLAlchemy engine.
+    """
+    settings = ENGINE_PROFILES[profile]
+    engine = create_engine(f'sqlite:///{path}', **settings['engine_args'])
+
+    if settings['pragmas']:
+        @event.listens_for(engine, 'connect')
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma, value in settings['pragmas'].items():
+                cursor.execute(f'PRAGMA {pragma}={value}')
+            cursor.close()
+
+    return engine
 
 database_path = os.path.join(BASE_DIR, 'database', 'alttpr_tool.db')
 Base = declarative_base()
-engine = create_engine(f'sqlite:///{database_path}')
+engine = create_database_engine(database_path)
 Session = sessionmaker(bind=engine)
 
 @contextmanager
@@ -23,3 +69,14 @@ def managed_session():
     finally:
         session.close()
 
+@contextmanager
+def read_session():
+    """
+    Session for queries that do not write. Skips the commit; closing the session simply
+    releases the connection back to the pool.
+    """
+    session = Session()
+    try:
+        yield session
+    finally:
+        session.close()
@@ -1,29 +1,69 @@
 import logging
 import os
-import socket
+import queue
 import sys
+import time
 
 import tkinter as tk
 from tkinter import messagebox
 import customtkinter as ctk
 
-from config import APP_HEIGHT, APP_WIDTH, BASE_DIR, ICONS_DIR
+from config import (APP_HEIGHT, APP_WIDTH, BASE_DIR, CONNECTIVITY_POLL_INTERVAL_MS, ICONS_DIR, LAZY_FRAMES,
+                    LOG_LEVEL_CHECK_INTERVAL_MS)
+from database.operations import get_user_settings
 from gui.generate_seed_window import GenerateSeedWindow
+from gui.image_cache import apply_appearance_mode
 from gui.main_window import MainWindow
 from gui.msu_download_window import MSUDownloadWindow
 from gui.setup_window import SetupWindow
 from gui.sfc_selection_window import SFCSelectionWindow
+from utilities.connectivity import ConnectivityMonitor
 from utilities.file_management import get_download_dir, get_msu_dir
+from utilities.fs_watcher import MSU_FOLDERS, FileSystemWatcher
+from utilities.google_services import warm_up_services
+from utilities.seed_service import SeedService
 from utilities.initialize_db import initialize_db
+from utilities.log_setup import reload_log_level
+from utilities.msu_library import MsuIndexRefresher
 
 
 class App(tk.Tk):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, started_at=None, **kwargs):
+        # Startup phases as (name, seconds since started_at), reported once the first window is drawn
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.startup_marks = []
+        self.mark_startup("imports")
+
         super().__init__(*args, **kwargs)
 
         initialize_db()
         logging.info("Database initialized")
 
+        # Set the theme before any frame loads its background, so only that theme's images are decoded
+        apply_appearance_mode(get_user_settings()['dark_mode'])
+        self.mark_startup("database")
+
+        # Keeps the .sfc and MSU folder lists current so screen switches don't rescan the disk
+        self.fs_watcher = FileSystemWatcher()
+        # Re-index packs when the MSU folders change, so naming convention lookups rarely scan a pack
+        self.msu_index = MsuIndexRefresher()
+        self.fs_watcher.add_listener(self.on_watched_files_changed)
+        self.fs_watcher.start(get_download_dir(), get_msu_dir())
+
+        # Probes the network in the background so is_connected never blocks the UI. Tk must not be
+        # called from the monitor thread, so changes are queued and picked up by check_connectivity.
+        self.connectivity_changes = queue.Queue()
+        self.connectivity = ConnectivityMonitor()
+        self.connectivity.add_listener(self.connectivity_changes.put)
+        self.connectivity.start()
+
+        # Google services are built lazily; with a saved token, build them off the UI thread now
+        warm_up_services()
+
+        # Generates seeds on a background event loop, started on the first request
+        self.seed_service = SeedService()
+        self.mark_startup("services")
+
         self.title("ALTTPR Tool")
         self.geometry(f"{APP_WIDTH}x{APP_HEIGHT}")
 
@@ -45,7 +85,9 @@ class App(tk.Tk):
         }
 
         self.frames = {}
-        self.create_frames()
+        if not LAZY_FRAMES:
+            self.create_frames()
+            self.mark_startup("frames")
 
         if self.check_initial_setup():
             logging.info("Initial setup required, showing setup window")
@@ -53,8 +95,13 @@ class App(tk.Tk):
         else:
             logging.info("No initial setup required, showing generate seed window")
             self.show_generate_seed_window()
+        self.mark_startup("first frame")
 
         logging.info("Application initialization completed")
+        # Idle callbacks run once the pending drawing is done, i.e. when the window is on screen
+        self.after_idle(self.report_startup_time)
+        self.after(LOG_LEVEL_CHECK_INTERVAL_MS, self.check_log_level)
+        self.after(CONNECTIVITY_POLL_INTERVAL_MS, self.check_connectivity)
         
         try:
             # First try the development path
@@ -80,6 +127,9 @@ class App(tk.Tk):
     def on_closing(self):
         """Handle application close event."""
         logging.info("Application is closing")
+        self.fs_watcher.stop()
+        self.seed_service.stop()
+        self.connectivity.stop()
         self.destroy()
         sys.exit()
 
@@ -95,13 +145,59 @@ class App(tk.Tk):
         else:
             return BASE_DIR
     
+    def mark_startup(self, phase):
+        """
+        Record how long after launch a startup phase finished.
+
+        :param phase: Name of the phase.
+        """
+        self.startup_marks.append((phase, time.perf_counter() - self.started_at))
+
+    def report_startup_time(self):
+        """Log the time to first window, broken down by startup phase."""
+        self.mark_startup("window drawn")
+        previous = 0.0
+        phases = []
+        for phase, elapsed in self.startup_marks:
+            phases.append(f"{phase} {elapsed - previous:.3f}s")
+            previous = elapsed
+        mode = "lazy" if LAZY_FRAMES else "eager"
+        logging.info(f"Time to first window ({mode} frames): {previous:.3f}s ({', '.join(phases)})")
+
+    def check_log_level(self):
+        """Apply changes to log_level.txt while the application is running."""
+        reload_log_level()
+        self.after(LOG_LEVEL_CHECK_INTERVAL_MS, self.check_log_level)
+
+    def check_connectivity(self):
+        """Handle connectivity changes queued by the monitor thread."""
+        try:
+            while True:
+                self.on_connectivity_changed(self.connectivity_changes.get_nowait())
+        except queue.Empty:
+            pass
+        self.after(CONNECTIVITY_POLL_INTERVAL_MS, self.check_connectivity)
+
     def create_frames(self):
         """Create and initialize all frames (windows) for the application."""
         for F in (MainWindow, MSUDownloadWindow, SetupWindow, SFCSelectionWindow, GenerateSeedWindow):
-            frame = F(self.container, self)
-            self.frames[F] = frame
+            self.get_frame(F)
+
+    def get_frame(self, context):
+        """
+        Return a frame, creating it the first time it is needed.
+
+        :param context: Frame class.
+        :return: The frame instance.
+        """
+        frame = self.frames.get(context)
+        if frame is None:
+            started = time.perf_counter()
+            frame = context(self.container, self)
+            self.frames[context] = frame
             frame.grid(row=0, column=0, sticky="nsew")
-            logging.debug(f"{F.__name__} frame created")
+            logging.debug(f"{context.__name__} frame created in {time.perf_counter() - started:.3f}s")
+        return frame
 
     def show_frame(self, context):
         """
@@ -109,7 +205,7 @@ class App(tk.Tk):
 
         :param context: Frame class to be raised to the top.
         """
-        frame = self.frames[context]
+        frame = self.get_frame(context)
         if hasattr(frame, 'reset_window'):
             frame.reset_window()
             logging.debug(f"{context.__name__} frame reset")
@@ -140,6 +236,8 @@ class App(tk.Tk):
     def show_msu_download_window(self):
         """Show the MSUDownloadWindow frame if internet connection is available."""
         if not self.is_connected():
+            # The cached state may be old, so check again for the next attempt
+            self.connectivity.request_check()
             logging.error("No internet connection. Cannot open MSUDownloadWindow")
             messagebox.showerror("Error", "No internet connection. Cannot open MSU Download Window.")
             return
@@ -171,19 +269,31 @@ class App(tk.Tk):
         logging.info(f"Initial setup check: Needed - {need_setup}")
         return need_setup
     
-    def is_connected(self, hostname="www.google.com"):
+    def is_connected(self):
         """
-        Check if there is an internet connection.
+        Check if there is an internet connection, using the last result of the connectivity monitor.
 
-        :param hostname: Hostname to connect to for checking internet connectivity.
         :return: Boolean indicating if there is an internet connection.
         """
-        try:
-            host = socket.gethostbyname(hostname)
-            s = socket.create_connection((host, 80), 2)
-            s.close()
-            logging.debug("Internet connection check: Connected")
-            return True
-        except Exception as e:
-            logging.warning(f"Internet connection check failed: {e}")
-        return False
\ No newline at end of file
+        return self.connectivity.is_connected()
+
+    def on_watched_files_changed(self, collection):
+        """
+        Handle a change reported by the file system watcher, called from the thread that noticed it.
+
+        :param collection: SFC_FILES or MSU_FOLDERS.
+        """
+        if collection == MSU_FOLDERS:
+            self.msu_index.request_refresh(self.fs_watcher.paths[MSU_FOLDERS])
+
+    def on_connectivity_changed(self, connected):
+        """
+        Handle the connection going up or down.
+
+        :param connected: Boolean indicating if there is an internet connection.
+        """
+        logging.info(f"Connectivity changed: {'online' if connected else 'offline'}")
+        download_window = self.frames.get(MSUDownloadWindow)
+        if connected and download_window:
+            # Fetch the MSU list if it went stale while offline
+            download_window.load_catalog()
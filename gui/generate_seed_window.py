@@ -1,17 +1,15 @@
+import copy
 import logging
-import os
 import webbrowser
-import yaml
 
-import asyncio
 import customtkinter as ctk  # Keep this for background handling
 from tkinter import messagebox
 import ttkbootstrap as ttk
-from PIL import Image
 
-from config import APP_HEIGHT, APP_WIDTH, BUTTON_WIDTH, DARK_DIR, LIGHT_DIR, PRESETS_DIR
-from utilities.seed_generator import (get_yaml_presets,
-                                      main_generate)
+from config import BUTTON_WIDTH
+from gui.image_cache import apply_appearance_mode, get_background
+from utilities.preset_registry import preset_registry
+from utilities.seed_generator import get_yaml_presets
 import database.operations as db_ops
 
 class GenerateSeedWindow(ttk.Frame):
@@ -33,12 +31,8 @@ class GenerateSeedWindow(ttk.Frame):
         self.background_frame = ctk.CTkFrame(self)
         self.background_frame.place(x=0, y=0, relwidth=1, relheight=1) 
 
-        # Create light and dark mode background images
-        self.light_image = Image.open(os.path.join(LIGHT_DIR, self.background_image_file)) 
-        self.dark_image = Image.open(os.path.join(DARK_DIR, self.background_image_file)) 
-
-        # Create customtkinter image with the light and dark images
-        self.bg_image = ctk.CTkImage(light_image=self.light_image, dark_image=self.dark_image, size=(APP_WIDTH, APP_HEIGHT))
+        # Shared background image, decoded once and scaled to the window size
+        self.bg_image = get_background(self.background_image_file)
         
         # Create and place label for holding the background image
         self.bg_image_label = ctk.CTkLabel(self.background_frame, image=self.bg_image, text="")
@@ -86,44 +80,49 @@ class GenerateSeedWindow(ttk.Frame):
             # Update the preset file with spoiler setting before generating
             self.update_preset_spoilers(preset_name, enable_spoilers)
 
-            loop = asyncio.get_event_loop()
-            seed = loop.run_until_complete(main_generate(preset_name))
+            future = self.controller.seed_service.generate(preset_name)
+            self.controller.seed_service.deliver(self, future, self.on_seed_generated, self.on_seed_error)
 
-            if seed and hasattr(seed, 'url'):
-                webbrowser.open(seed.url)
-                logging.info(f"Seed URL opened in browser: {seed.url}")
-            else:
-                logging.warning("Generated seed does not have a URL or is None.")
-                
         except Exception as e:
             logging.error(f"Error generating seed: {e}", exc_info=True)
 
+    def on_seed_generated(self, seed):
+        """Opens a generated seed in the browser."""
+        if seed and hasattr(seed, 'url'):
+            webbrowser.open(seed.url)
+            logging.info(f"Seed URL opened in browser: {seed.url}")
+        else:
+            logging.warning("Generated seed does not have a URL or is None.")
+
+    def on_seed_error(self, error):
+        logging.error(f"Error generating seed: {error}", exc_info=error)
+        messagebox.showerror("Error", f"Could not generate seed: {error}")
+
     def update_preset_spoilers(self, preset_name, enable_spoilers):
         """Update the spoiler setting in the preset file."""
         try:
-            preset_path = os.path.join(PRESETS_DIR, f"{preset_name}.yaml")
-            
-            # Read current preset
-            with open(preset_path, 'r') as f:
-                preset_data = yaml.safe_load(f)
+            # Copy the cached preset, since it is shared with every other reader
+            preset_data = copy.deepcopy(preset_registry.load(preset_name))
 
             # Update spoiler setting
             if 'settings' in preset_data:
                 # Handle nested settings structure
-                if isinstance(preset_data['settings'].get('spoilers', False), bool):
-                    preset_data['settings']['spoilers'] = enable_spoilers
-                else:
-                    preset_data['settings']['spoilers'] = "on" if enable_spoilers else "off"
+                target = preset_data['settings']
             else:
                 # Handle root level settings
-                if isinstance(preset_data.get('spoilers', False), bool):
-                    preset_data['spoilers'] = enable_spoilers
-                else:
-                    preset_data['spoilers'] = "on" if enable_spoilers else "off"
+                target = preset_data
+            if isinstance(target.get('spoilers', False), bool):
+                spoilers = enable_spoilers
+            else:
+                spoilers = "on" if enable_spoilers else "off"
+
+            if target.get('spoilers') == spoilers:
+                # Rewriting an unchanged preset would only invalidate its cached parse
+                return
+            target['spoilers'] = spoilers
 
             # Write updated preset back to file
-            with open(preset_path, 'w') as f:
-                yaml.safe_dump(preset_data, f, default_flow_style=False)
+            preset_registry.save(preset_name, preset_data)
 
             logging.info(f"Updated spoiler setting to {enable_spoilers} in preset {preset_name}")
 
@@ -139,9 +138,6 @@ class GenerateSeedWindow(ttk.Frame):
 
         self.seed_preset_selection_dropdown.set("")
 
-        if self.get_user_settings()['dark_mode'] == 0:
-            ctk.set_appearance_mode('light')
-        else:
-            ctk.set_appearance_mode('dark')
+        apply_appearance_mode(self.get_user_settings()['dark_mode'])
 
         logging.info("GenerateSeedWindow reset complete.")
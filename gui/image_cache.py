@@ -0,0 +1,76 @@
+import logging
+import os
+
+import customtkinter as ctk
+from PIL import Image
+
+from config import APP_HEIGHT, APP_WIDTH, DARK_DIR, LIGHT_DIR
+
+LIGHT = 'light'
+DARK = 'dark'
+THEME_DIRS = {LIGHT: LIGHT_DIR, DARK: DARK_DIR}
+
+# Decoded images by (file name, theme, size) and shared CTkImages by (file name, size)
+_images = {}
+_backgrounds = {}
+_appearance_mode = None
+
+
+def load_image(file_name, theme, size):
+    """
+    Returns an image from a theme directory, decoded and scaled to the given size. Each image
+    is only read from disk once.
+
+    :param file_name: Name of the image file.
+    :param theme: LIGHT or DARK.
+    :param size: (width, height) to scale the image to.
+    :return: PIL image.
+    """
+    key = (file_name, theme, size)
+    image = _images.get(key)
+    if image is None:
+        with Image.open(os.path.join(THEME_DIRS[theme], file_name)) as source:
+            image = source.resize(size, Image.LANCZOS)
+        _images[key] = image
+        logging.debug(f"Loaded {theme} image {file_name} at {size[0]}x{size[1]}")
+    return image
+
+
+def get_background(file_name, size=(APP_WIDTH, APP_HEIGHT)):
+    """
+    Returns the CTkImage for a background, shared by every frame that uses it. Only the image
+    for the current appearance mode is loaded; the other one is added when the mode changes.
+
+    :param file_name: Name of the image file in the light and dark image directories.
+    :param size: Display size of the image.
+    :return: CTkImage.
+    """
+    key = (file_name, size)
+    background = _backgrounds.get(key)
+    if background is None:
+        theme = _appearance_mode or LIGHT
+        background = ctk.CTkImage(**{f'{theme}_image': load_image(file_name, theme, size)}, size=size)
+        _backgrounds[key] = background
+    return background
+
+
+def apply_appearance_mode(dark_mode):
+    """
+    Switches between light and dark mode. customtkinter redraws every widget on a mode change,
+    so nothing happens if the mode is already active.
+
+    :param dark_mode: Truthy for dark mode.
+    """
+    global _appearance_mode
+    mode = DARK if dark_mode else LIGHT
+    if mode == _appearance_mode:
+        return
+
+    # Without an image for the new mode, CTkImage would keep showing the other one
+    for (file_name, size), background in _backgrounds.items():
+        if background.cget(f'{mode}_image') is None:
+            background.configure(**{f'{mode}_image': load_image(file_name, mode, size)})
+
+    ctk.set_appearance_mode(mode)
+    _appearance_mode = mode
+    logging.info(f"Appearance mode set to {mode}")
@@ -6,12 +6,12 @@ import subprocess
 import customtkinter as ctk
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
-from PIL import Image, ImageTk
 from tkinter import messagebox
 
-from config import APP_HEIGHT, APP_WIDTH, BUTTON_WIDTH, DARK_DIR, LIGHT_DIR
+from config import BUTTON_WIDTH
+from gui.image_cache import apply_appearance_mode, get_background
 from database.operations import get_selected_sfc, get_user_settings
-from utilities.file_management import get_full_msu_dir, get_msus, get_msu_name_convention, move_file, rmv_existing_sfc
+from utilities.file_management import get_full_msu_dir, get_msu_name_convention, move_file
 
 class MainWindow(ttk.Frame):
     def __init__(self, parent, controller):
@@ -20,7 +20,7 @@ class MainWindow(ttk.Frame):
 
         logging.info("MainWindow initialized")
 
-        self.msu_folders = get_msus()
+        self.msu_folders = list(self.controller.fs_watcher.msu_folders())
         
         logging.debug(f"MSU folders loaded: {self.msu_folders}")
 
@@ -31,12 +31,8 @@ class MainWindow(ttk.Frame):
         self.background_frame = ctk.CTkFrame(self)
         self.background_frame.place(x=0, y=0, relwidth=1, relheight=1) 
 
-        # Create light and dark mode background images
-        self.light_image = Image.open(os.path.join(LIGHT_DIR, self.background_image_file)) 
-        self.dark_image = Image.open(os.path.join(DARK_DIR, self.background_image_file)) 
-
-        # Create customtkinter image with the light and dark images
-        self.bg_image = ctk.CTkImage(light_image=self.light_image, dark_image=self.dark_image, size=(APP_WIDTH, APP_HEIGHT))
+        # Shared background image, decoded once and scaled to the window size
+        self.bg_image = get_background(self.background_image_file)
         
         # Create and place label for holding the background image
         self.bg_image_label = ctk.CTkLabel(self.background_frame, image=self.bg_image, text="")
@@ -80,7 +76,7 @@ class MainWindow(ttk.Frame):
         
         logging.info("Resetting MainWindow...")
         
-        self.msu_folders = get_msus()
+        self.msu_folders = list(self.controller.fs_watcher.msu_folders())
         
         logging.debug(f"MSU folders: {self.msu_folders}")
 
@@ -109,10 +105,7 @@ class MainWindow(ttk.Frame):
         if self.msu_folders:
             self.msu_select_dropdown.set(self.msu_folders[0])
 
-        if self.get_user_settings()['dark_mode'] == 0:
-            ctk.set_appearance_mode('light')
-        else:
-            ctk.set_appearance_mode('dark')
+        apply_appearance_mode(self.get_user_settings()['dark_mode'])
 
         logging.info("MainWindow reset complete.")
 
@@ -147,7 +140,6 @@ class MainWindow(ttk.Frame):
         logging.debug(f'Naming Conv: {naming_convention}')
         new_file_name = f"{naming_convention}.sfc"
         logging.debug(f'New file name: {new_file_name}')
-        rmv_existing_sfc(msu, naming_convention)
         sfc_file = get_selected_sfc()
         if sfc_file == "":
             messagebox.showerror("Error", "No SFC file downloaded.")
@@ -155,12 +147,14 @@ class MainWindow(ttk.Frame):
             logging.debug(f'SFC File: {sfc_file}')
             new_sfc_path = os.path.join(get_full_msu_dir(msu), new_file_name)  # Pass msu to get_full_msu_dir
             logging.debug(f'New SFC Path: {new_sfc_path}')
+            # Replaces the pack's previous ROM atomically, so it is never missing or half-written
             move_file(sfc_file, new_sfc_path)
 
+            settings = get_user_settings()
             if os.path.exists(new_sfc_path):
                 messagebox.showinfo("Info", f"SFC successfully moved to {get_full_msu_dir(msu)}")
-                if get_user_settings()['auto_run'] == 1:
+                if settings['auto_run'] == 1:
                     self.auto_run(new_sfc_path)
 
-            if get_user_settings()['tracker_path']:
-                self.auto_run(get_user_settings()['tracker_path'])
+            if settings['tracker_path']:
+                self.auto_run(settings['tracker_path'])
@@ -1,19 +1,24 @@
 import logging
 import os
+import queue
 import re
+import threading
 import webbrowser
 
 import customtkinter as ctk  # Keep this for background handling
 import ttkbootstrap as ttk
-from PIL import Image
 import tkinter as tk
 from tkinter import messagebox
 
-from config import APP_HEIGHT, APP_WIDTH, DARK_DIR, LIGHT_DIR
+from config import UI_EVENT_POLL_INTERVAL_MS
+from gui.image_cache import apply_appearance_mode, get_background
 import database.operations as db_ops
 from utilities.download_queue import DownloadQueue
 from utilities.google_drive import GoogleDriveData
 from utilities.google_sheets import GoogleSheetsData
+from utilities.log_setup import RATE_LIMITED
+
+LOADING_PLACEHOLDER = "Loading MSU list..."
 
 class MSUDownloadWindow(ttk.Frame):
     def __init__(self, parent, controller):
@@ -22,21 +27,14 @@ class MSUDownloadWindow(ttk.Frame):
 
         logging.info("MSUDownloadWindow initialized")
 
-        self.msus_from_google_sheets = []
-
-        if self.controller.is_connected():
-
-            self.sheets_data = GoogleSheetsData()
-            
-            logging.info("GoogleSheetsData initialized")
+        self.sheets_data = GoogleSheetsData()
 
-            if self.sheets_data.get_msu_names() == []:
-                logging.debug("GoogleSheetsData.get_msu_names return an empty list. Fetching data...")
-                self.sheets_data.get_all_data()
+        # Background threads must not touch Tk; they queue calls for process_ui_events to run
+        self.ui_events = queue.Queue()
+        self.after(UI_EVENT_POLL_INTERVAL_MS, self.process_ui_events)
 
-            self.msus_from_google_sheets = self.sheets_data.get_msu_names()
-
-            logging.debug("MSU names fetched from Google Sheet")
+        # Filled in by load_catalog once the MSU data has been read
+        self.msus_from_google_sheets = []
 
         self.download_queue = DownloadQueue(all_downloads_complete_callback=self.show_download_report)
 
@@ -50,12 +48,8 @@ class MSUDownloadWindow(ttk.Frame):
         self.background_frame = ctk.CTkFrame(self)
         self.background_frame.place(x=0, y=0, relwidth=1, relheight=1) 
 
-        # Create light and dark mode background images
-        self.light_image = Image.open(os.path.join(LIGHT_DIR, self.background_image_file)) 
-        self.dark_image = Image.open(os.path.join(DARK_DIR, self.background_image_file)) 
-
-        # Create customtkinter image with the light and dark images
-        self.bg_image = ctk.CTkImage(light_image=self.light_image, dark_image=self.dark_image, size=(APP_WIDTH, APP_HEIGHT))
+        # Shared background image, decoded once and scaled to the window size
+        self.bg_image = get_background(self.background_image_file)
         
         # Create and place label for holding the background image
         self.bg_image_label = ctk.CTkLabel(self.background_frame, image=self.bg_image, text="")
@@ -99,23 +93,80 @@ class MSUDownloadWindow(ttk.Frame):
         for i in range(2):  # Iterates through a range to configure column weights
             self.grid_columnconfigure(i, weight=1)
 
+    def load_catalog(self):
+        """
+        Loads the MSU list on a background thread, showing a placeholder until it is ready.
+        The catalog saved by the last fetch is shown as soon as it is read; when connected,
+        a stale or missing catalog is then fetched from Google Sheets.
+        """
+        if not self.sheets_data.is_loaded():
+            self.msu_dropdown.set(LOADING_PLACEHOLDER)
+            self.msu_dropdown.configure(state='disabled')
+
+        def load():
+            if not self.sheets_data.is_loaded():
+                self.sheets_data.load_cached_data()
+                logging.debug("MSU names loaded")
+            if self.sheets_data.is_stale() and self.controller.is_connected():
+                self.sheets_data.refresh_in_background(callback=lambda: self.call_on_ui(self.show_catalog, True))
+            self.call_on_ui(self.show_catalog)
+
+        threading.Thread(target=load, name="msu-catalog-load", daemon=True).start()
+
+    def call_on_ui(self, function, *args):
+        """
+        Run a function on the Tk thread. Safe to call from any thread.
+
+        :param function: Function to run.
+        :param args: Arguments for the function.
+        """
+        self.ui_events.put((function, args))
+
+    def process_ui_events(self):
+        """Run the calls queued by background threads and the download queue."""
+        self.download_queue.process_events()
+        try:
+            while True:
+                function, args = self.ui_events.get_nowait()
+                try:
+                    function(*args)
+                except Exception as e:
+                    logging.error(f"Error handling a background result: {e}", exc_info=True)
+        except queue.Empty:
+            pass
+        self.after(UI_EVENT_POLL_INTERVAL_MS, self.process_ui_events)
+
+    def show_catalog(self, refresh_finished=False):
+        """
+        Fills the dropdown with the loaded MSU names.
+
+        :param refresh_finished: Called from a finished background refresh.
+        """
+        self.msus_from_google_sheets = self.sheets_data.get_msu_names()
+        self.msu_dropdown['values'] = self.msus_from_google_sheets
+        # Keep the placeholder while the first fetch is still running
+        if self.msu_dropdown.get() == LOADING_PLACEHOLDER and (self.msus_from_google_sheets or refresh_finished or
+                                                                   not self.sheets_data.is_refreshing()):
+            self.msu_dropdown.set("")
+            self.msu_dropdown.configure(state='readonly')
+
     def update_progress_bar(self, value):
         """
         Updates the progress bar
         :param value: Value to update progress bar to
         """
-        self.after(0, lambda: self.progress_bar.set(value / 100.0))
-        logging.debug("Progress bar updated")
+        self.progress_bar.set(value / 100.0)
+        logging.debug("Progress bar updated", extra=RATE_LIMITED)
 
     def add_msu(self):
         """Adds the selected MSU from the dropdown to the msus_to_download listbox"""
         selection = self.msu_dropdown.get() # Gets the current dropdown/combobox selection
 
         # Adds the selection to the listbox if it's (the selection) not empty
-        if selection:
+        if selection and selection != LOADING_PLACEHOLDER:
             self.msus_to_download.insert(tk.END, selection)
             logging.info(f"Added MSU to download list: {selection}")
-            file_id = self.extract_file_ids_from_links(self.sheets_data.get_download_link(selection))
+            file_id = self.sheets_data.get_file_id(selection)
             if not file_id:
                 self.msus_to_download.itemconfig(tk.END, {'bg': 'orange'})
                 self.download_outcomes["manual"].append(selection)
@@ -146,26 +197,6 @@ class MSUDownloadWindow(ttk.Frame):
             msu_download_links.append(self.sheets_data.get_download_link(msu))
         return msu_download_links
 
-    def extract_file_ids_from_links(self, link):
-        """
-        Extracts the file ID from a Google Drive sharing link.
-        :param link: Google Drive sharing link.
-        :return: File ID or None if the link is invalid.
-        """
-
-        # Regex patterns to match both types of URLs
-        file_patterns = [
-            r'^https?://drive\.google\.com/file/d/([^/]+)(/view\?.+)?',
-            r'^https?://drive\.google\.com/open\?id=([^/]+)$'
-        ]
-
-        for pattern in file_patterns:
-            match = re.match(pattern, link)
-            if match:
-                return match.group(1)
-
-        return None
-
     def get_selected_msu_names(self):
         """
         Returns a list of all MSU names that the user has added to the listbox
@@ -214,12 +245,10 @@ class MSUDownloadWindow(ttk.Frame):
         msu_data_list = self.sheets_data.get_msu_data(selected_msu_names)
 
         for i, msu_data in enumerate(msu_data_list):
-            file_id = self.extract_file_ids_from_links(msu_data['Download'])
+            file_id = msu_data['File ID']
             if file_id:
                 try:
-                    # Extract the file ID from the download link
-                    file_id = self.extract_file_ids_from_links(msu_data['Download'])
-                    print(f'File ID from download_msus: {file_id}')
+                    logging.debug(f'File ID from download_msus: {file_id}')
                     # Construct the file name using the pack name and format
                     if msu_data['Format'].lower() == "7-zip":
                         file_name = f"{msu_data['Pack Name']}.{'7z'}"
@@ -233,7 +262,8 @@ class MSUDownloadWindow(ttk.Frame):
                     
                     completion_callback = self.make_completion_callback(i)
 
-                    self.download_queue.add_to_queue(file_id, dl_destination, GoogleDriveData.download_file, self.update_progress_bar, completion_callback)
+                    self.download_queue.add_to_queue(file_id, dl_destination, GoogleDriveData.download_file_segmented, self.update_progress_bar, completion_callback,
+                                                     stream_method=GoogleDriveData.stream_file)
 
                     logging.debug(f"Download {msu_data['Pack Name']} from {msu_data['Download']}")
                 except Exception as e:
@@ -244,11 +274,8 @@ class MSUDownloadWindow(ttk.Frame):
     def reset_window(self):
         logging.info("Resetting MSUDownloadWindow...")
 
-        # Refresh the list of MSU names from Google Sheets.
-        self.msus_from_google_sheets = self.sheets_data.get_msu_names()
-        
-        # Update the MSU dropdown with the latest data.
-        self.msu_dropdown['values'] = self.msus_from_google_sheets
+        # Refresh the list of MSU names, starting a background fetch if the cached data is stale.
+        self.load_catalog()
 
         # Clear the listbox containing MSUs queued for download.
         self.msus_to_download.delete(0, tk.END)
@@ -257,9 +284,6 @@ class MSUDownloadWindow(ttk.Frame):
         # Reset the progress bar to 0, indicating no current download progress.
         self.progress_bar.set(0)
 
-        if db_ops.get_user_settings()['dark_mode'] == 0:
-            ctk.set_appearance_mode('light')
-        else:
-            ctk.set_appearance_mode('dark')
+        apply_appearance_mode(db_ops.get_user_settings()['dark_mode'])
 
         logging.info("MSUDownloadWindow reset complete.")
\ No newline at end of file
@@ -5,9 +5,9 @@ import logging
 import customtkinter as ctk
 import ttkbootstrap as ttk
 from tkinter import StringVar, IntVar, messagebox, filedialog
-from PIL import Image, ImageTk
 
-from config import APP_HEIGHT, APP_WIDTH, BUTTON_WIDTH, BASE_DIR, DARK_DIR, LIGHT_DIR
+from config import BUTTON_WIDTH, BASE_DIR
+from gui.image_cache import apply_appearance_mode, get_background
 import database.operations as db_ops
 
 class SetupWindow(ttk.Frame):
@@ -31,21 +31,14 @@ class SetupWindow(ttk.Frame):
         self.background_frame = ctk.CTkFrame(self)
         self.background_frame.place(x=0, y=0, relwidth=1, relheight=1)
 
-        # Create light and dark mode background images
-        self.light_image = Image.open(os.path.join(LIGHT_DIR, self.background_image_file))
-        self.dark_image = Image.open(os.path.join(DARK_DIR, self.background_image_file))
-
-        # Create customtkinter image with the light and dark images
-        self.bg_image = ctk.CTkImage(light_image=self.light_image, dark_image=self.dark_image, size=(APP_WIDTH, APP_HEIGHT))
+        # Shared background image, decoded once and scaled to the window size
+        self.bg_image = get_background(self.background_image_file)
 
         # Create and place label for holding the background image
         self.bg_image_label = ctk.CTkLabel(self.background_frame, image=self.bg_image, text="")
         self.bg_image_label.grid(row=0, column=0)
 
-        if db_ops.get_user_settings()['dark_mode'] == 0:
-            ctk.set_appearance_mode('light')
-        else:
-            ctk.set_appearance_mode('dark')
+        apply_appearance_mode(db_ops.get_user_settings()['dark_mode'])
 
         # Nav Menu
         if not self.controller.check_initial_setup():
@@ -172,6 +165,7 @@ class SetupWindow(ttk.Frame):
         """Save the provided settings to the database."""
         logging.info(f"Saving settings to database: {download_path}, {msu_master_path}, {tracker_path}, {dark_mode_var}, {auto_run_var}")
         db_ops.save_settings_to_db(download_path, msu_master_path, tracker_path, dark_mode_var, auto_run_var)
+        self.controller.fs_watcher.set_paths(download_path, msu_master_path)
     
     def reset_window(self):
         """Reset the window to reflect the current settings."""
@@ -195,8 +189,5 @@ class SetupWindow(ttk.Frame):
             self.dark_mode_var.set(0)
             self.auto_run_var.set(0)
 
-        if settings and settings.get('dark_mode') == 0:
-            ctk.set_appearance_mode('light')
-        else:
-            ctk.set_appearance_mode('dark')
+        apply_appearance_mode(not settings or settings.get('dark_mode') != 0)
         logging.info("SetupWindow reset complete")
\ No newline at end of file
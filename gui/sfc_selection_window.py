@@ -1,13 +1,10 @@
-import os
 import logging
 
 import customtkinter as ctk  # Keep this for background handling
 import ttkbootstrap as ttk
-from PIL import Image
 
-from config import APP_HEIGHT, APP_WIDTH, BUTTON_WIDTH, DARK_DIR, LIGHT_DIR
+from gui.image_cache import apply_appearance_mode, get_background
 from database.operations import get_user_settings, save_sfc_selection_to_db
-from utilities.file_management import get_sfc_files
 
 class SFCSelectionWindow(ttk.Frame):
     def __init__(self, parent, controller):
@@ -15,19 +12,15 @@ class SFCSelectionWindow(ttk.Frame):
         self.controller = controller
         logging.info("Initializing SFCSelectionWindow")
 
-        self.sfc_files = get_sfc_files()  # Get SFC files from downloads folder
+        self.sfc_files = list(self.controller.fs_watcher.sfc_files())  # Get SFC files from downloads folder
         self.background_image_file = 'SFCFileSelect.png'  # Define background image file name
 
         # Create background frame to hold background image & place it.
         self.background_frame = ctk.CTkFrame(self)
         self.background_frame.place(x=0, y=0, relwidth=1, relheight=1) 
 
-        # Create light and dark mode background images
-        self.light_image = Image.open(os.path.join(LIGHT_DIR, self.background_image_file)) 
-        self.dark_image = Image.open(os.path.join(DARK_DIR, self.background_image_file)) 
-
-        # Create customtkinter image with the light and dark images
-        self.bg_image = ctk.CTkImage(light_image=self.light_image, dark_image=self.dark_image, size=(APP_WIDTH, APP_HEIGHT))
+        # Shared background image, decoded once and scaled to the window size
+        self.bg_image = get_background(self.background_image_file)
 
         # Nav Menu
         self.nav_menu = ttk.OptionMenu(self, self.controller.selected_frame, *self.controller.frame_names.keys(), command=controller.on_select)
@@ -60,15 +53,12 @@ class SFCSelectionWindow(ttk.Frame):
     def reset_window(self):
         """Reset the window to update the list of .sfc files and user settings."""
         logging.info("Resetting SFCSelectionWindow")
-        self.sfc_files = get_sfc_files()
+        self.sfc_files = list(self.controller.fs_watcher.sfc_files())
 
         self.sfc_selection_dropdown['values'] = self.sfc_files
         self.sfc_selection_dropdown.set(self.sfc_files[0] if self.sfc_files else "")
 
-        if self.get_user_settings()['dark_mode'] == 0:
-            ctk.set_appearance_mode('light')
-        else:
-            ctk.set_appearance_mode('dark')
+        apply_appearance_mode(self.get_user_settings()['dark_mode'])
         logging.info("SFCSelectionWindow reset complete")
 
     def get_user_settings(self):
@@ -1,13 +1,23 @@
+import time
+
+# Taken before any other import, so the startup report includes import time
+STARTED_AT = time.perf_counter()
+
 import logging
-import os
+import multiprocessing
 
-from config import EXE_DIR, LOG_LEVEL
+from config import LOG_FILE_PATH, LOG_LEVEL
+from utilities.log_setup import setup_logging
 
-logging.basicConfig(filename=os.path.join(EXE_DIR, 'log_file.log'), level=getattr(logging, LOG_LEVEL.upper()), format='%(asctime)s:%(levelname)s:%(message)s')
-logging.debug("Starting application")
+# Extraction worker processes import this module too; only the main process owns the log file
+if multiprocessing.parent_process() is None:
+    setup_logging(LOG_FILE_PATH, LOG_LEVEL)
+    logging.debug("Starting application")
 from gui.app import App
 
 
 if __name__ == "__main__":
-    app = App()
+    # Required for the extraction process pool in frozen Windows builds
+    multiprocessing.freeze_support()
+    app = App(started_at=STARTED_AT)
     app.mainloop()
\ No newline at end of file
@@ -0,0 +1,110 @@
+import logging
+import socket
+import threading
+import time
+
+from config import (CONNECTIVITY_CHECK_INTERVAL_SECONDS, CONNECTIVITY_PROBE_HOST, CONNECTIVITY_PROBE_PORT,
+                    CONNECTIVITY_PROBE_TIMEOUT_SECONDS, CONNECTIVITY_RETRY_MAX_SECONDS, CONNECTIVITY_RETRY_MIN_SECONDS)
+
+
+class ConnectivityMonitor:
+    """
+    Background service that probes the network on a schedule and keeps the last result, so
+    callers can check for an internet connection without waiting on a socket.
+
+    While online the probe runs every check_interval seconds. While offline it retries after
+    retry_min seconds, doubling the delay up to retry_max.
+    """
+    def __init__(self, host=CONNECTIVITY_PROBE_HOST, port=CONNECTIVITY_PROBE_PORT, timeout=CONNECTIVITY_PROBE_TIMEOUT_SECONDS,
+                 check_interval=CONNECTIVITY_CHECK_INTERVAL_SECONDS, retry_min=CONNECTIVITY_RETRY_MIN_SECONDS,
+                 retry_max=CONNECTIVITY_RETRY_MAX_SECONDS):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.check_interval = check_interval
+        self.retry_min = retry_min
+        self.retry_max = retry_max
+        self.connected = None
+        self.checked_at = None
+        self.listeners = []
+        self.wake = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """Start probing in the background."""
+        self.thread = threading.Thread(target=self.run, name="connectivity-monitor", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the background thread."""
+        self.stopped.set()
+        self.wake.set()
+        if self.thread:
+            self.thread.join(timeout=self.timeout + 1)
+
+    def add_listener(self, callback):
+        """
+        Register a function called from the monitor thread whenever the connection state changes.
+
+        :param callback: Function taking True when connected and False otherwise.
+        """
+        self.listeners.append(callback)
+
+    def is_connected(self):
+        """
+        Returns the result of the last probe without probing. Before the first probe has
+        finished the connection is assumed to be up, and network errors are left to the caller.
+        """
+        return self.connected is not False
+
+    def request_check(self):
+        """Probe again as soon as possible instead of waiting for the next scheduled check."""
+        self.wake.set()
+
+    def probe(self):
+        """
+        Checks whether a TCP connection to the probe host can be opened.
+
+        :return: True if the connection succeeded.
+        """
+        try:
+            with socket.create_connection((self.host, self.port), self.timeout):
+                return True
+        except OSError as e:
+            logging.debug(f"Connectivity probe to {self.host}:{self.port} failed: {e}")
+            return False
+
+    def check(self):
+        """
+        Probe once, record the result and notify listeners if the state changed.
+
+        :return: True if connected.
+        """
+        connected = self.probe()
+        previous = self.connected
+        self.connected = connected
+        self.checked_at = time.time()
+        if connected != previous:
+            if connected:
+                logging.info("Internet connection check: Connected")
+            else:
+                logging.warning(f"Internet connection check failed: cannot reach {self.host}:{self.port}")
+            for listener in self.listeners:
+                try:
+                    listener(connected)
+                except Exception as e:
+                    logging.error(f"Connectivity listener failed: {e}", exc_info=True)
+        return connected
+
+    def run(self):
+        retry_delay = self.retry_min
+        while not self.stopped.is_set():
+            if self.check():
+                delay = self.check_interval
+                retry_delay = self.retry_min
+            else:
+                delay = retry_delay
+                retry_delay = min(retry_delay * 2, self.retry_max)
+            self.wake.wait(delay)
+            self.wake.clear()
@@ -0,0 +1,158 @@
+import json
+import logging
+import os
+import threading
+
+
+class DownloadManifest:
+    """
+    Sidecar manifest recording which byte ranges of a partial download are already on disk.
+
+    Ranges are stored as [start, end) pairs, kept sorted and merged, so a retry can
+    resume from the first missing byte instead of starting over.
+    """
+    def __init__(self, manifest_path, file_id, total_size=None, ranges=None):
+        self.manifest_path = manifest_path
+        self.file_id = file_id
+        self.total_size = total_size
+        self.ranges = []
+        self.lock = threading.Lock()
+        for start, end in ranges or []:
+            self._add_range(start, end)
+
+    @classmethod
+    def load(cls, manifest_path, file_id, partial_path):
+        """
+        Loads the manifest for a partial download, discarding it if it belongs to a different
+        file or claims more bytes than the partial file holds.
+
+        :param manifest_path: Path of the sidecar manifest.
+        :param file_id: ID of the file being downloaded.
+        :param partial_path: Path of the partial download the manifest describes.
+        :return: DownloadManifest instance.
+        """
+        if not os.path.exists(manifest_path) or not os.path.exists(partial_path):
+            return cls(manifest_path, file_id)
+
+        try:
+            with open(manifest_path, 'r') as manifest_file:
+                data = json.load(manifest_file)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable download manifest {manifest_path}: {e}")
+            return cls(manifest_path, file_id)
+
+        if data.get("file_id") != file_id:
+            logging.warning(f"Download manifest {manifest_path} belongs to another file, starting over")
+            return cls(manifest_path, file_id)
+
+        manifest = cls(manifest_path, file_id, data.get("total_size"), data.get("ranges"))
+        manifest.truncate(os.path.getsize(partial_path))
+        logging.info(f"Resuming download of {file_id} with {manifest.completed_bytes()} bytes already on disk")
+        return manifest
+
+    def _add_range(self, start, end):
+        if end <= start:
+            return
+        merged = []
+        for existing_start, existing_end in self.ranges:
+            if existing_end < start or existing_start > end:
+                merged.append([existing_start, existing_end])
+            else:
+                start = min(start, existing_start)
+                end = max(end, existing_end)
+        merged.append([start, end])
+        merged.sort()
+        self.ranges = merged
+
+    def add_range(self, start, end):
+        """
+        Marks the bytes in [start, end) as written.
+
+        :param start: First byte written.
+        :param end: One past the last byte written.
+        """
+        with self.lock:
+            self._add_range(start, end)
+
+    def reset(self, total_size=None):
+        """
+        Forgets every recorded range, e.g. when the server sends the whole file again.
+
+        :param total_size: New total size of the file, if known.
+        """
+        with self.lock:
+            self.ranges = []
+            self.total_size = total_size
+
+    def truncate(self, size):
+        """
+        Drops any recorded bytes at or beyond size.
+
+        :param size: Number of bytes actually present on disk.
+        """
+        with self.lock:
+            self.ranges = [[start, min(end, size)] for start, end in self.ranges if start < size]
+
+    def completed_bytes(self):
+        """Returns the number of bytes already written."""
+        with self.lock:
+            return sum(end - start for start, end in self.ranges)
+
+    def next_offset(self):
+        """Returns the first byte that has not been written yet."""
+        with self.lock:
+            if self.ranges and self.ranges[0][0] == 0:
+                return self.ranges[0][1]
+            return 0
+
+    def first_missing_offset(self, start, end):
+        """
+        Returns the first byte in [start, end) that has not been written yet.
+
+        :param start: Start of the range to check.
+        :param end: End of the range to check.
+        :return: Offset of the first missing byte, or end if the range is complete.
+        """
+        with self.lock:
+            for range_start, range_end in self.ranges:
+                if range_start <= start < range_end:
+                    start = range_end
+            return min(start, end)
+
+    def missing_ranges(self):
+        """
+        Returns the [start, end) ranges that still have to be downloaded.
+
+        :return: List of (start, end) tuples, or None if the total size is not known yet.
+        """
+        with self.lock:
+            if self.total_size is None:
+                return None
+            missing = []
+            offset = 0
+            for start, end in self.ranges:
+                if start > offset:
+                    missing.append((offset, start))
+                offset = max(offset, end)
+            if offset < self.total_size:
+                missing.append((offset, self.total_size))
+            return missing
+
+    def is_complete(self):
+        """Whether every byte of the file has been written."""
+        missing = self.missing_ranges()
+        return missing is not None and not missing
+
+    def save(self):
+        """Atomically writes the manifest next to the partial download."""
+        with self.lock:
+            data = {"file_id": self.file_id, "total_size": self.total_size, "ranges": self.ranges}
+            temp_path = f"{self.manifest_path}.tmp"
+            with open(temp_path, 'w') as manifest_file:
+                json.dump(data, manifest_file)
+            os.replace(temp_path, self.manifest_path)
+
+    def delete(self):
+        """Removes the manifest once the download is complete."""
+        if os.path.exists(self.manifest_path):
+            os.remove(self.manifest_path)
@@ -1,109 +1,398 @@
 import logging
 import os
-from queue import Queue
+from queue import Empty, Queue
 import threading
+import time
 
-from utilities.file_management import extract_msu, get_msu_dir
+from config import EXTRACT_QUEUE_SIZE, MAX_CONCURRENT_DOWNLOADS, MAX_CONCURRENT_EXTRACTIONS, STREAM_EXTRACT_ZIP
+from utilities.file_management import (create_pack_directory, extract_msu, extract_pack_name, get_msu_dir,
+                                       move_files_from_nested_dir, remove_empty_pack_directory)
+from utilities.streaming_zip import StreamingNotSupported, StreamingZipExtractor
+
+# Download job states
+JOB_QUEUED = 'queued'
+JOB_DOWNLOADING = 'downloading'
+JOB_WAITING_FOR_EXTRACT = 'waiting_for_extract'
+JOB_EXTRACTING = 'extracting'
+JOB_COMPLETE = 'complete'
+JOB_FAILED = 'failed'
+
+# Pipeline stages
+STAGE_DOWNLOAD = 'download'
+STAGE_EXTRACT = 'extract'
+
+
+class DownloadJob:
+    """
+    A single file in the download queue along with its current state.
+    """
+    def __init__(self, job_id, file_id, destination_path, download_method, progress_callback=None, completion_callback=None, stream_method=None):
+        self.job_id = job_id
+        self.file_id = file_id
+        self.destination_path = destination_path
+        self.download_method = download_method
+        self.stream_method = stream_method
+        self.streamed_to = None
+        self.progress_callback = progress_callback
+        self.completion_callback = completion_callback
+        self.state = JOB_QUEUED
+        self.progress = 0
+        self.error = None
+        self.queued_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.downloaded_at = None
+        self.stage_seconds = {STAGE_DOWNLOAD: None, STAGE_EXTRACT: None}
+        self.handoff_wait_seconds = None
+
+    def to_dict(self):
+        """
+        Returns a snapshot of the job state.
+
+        :return: Dictionary describing the job.
+        """
+        return {
+            "job_id": self.job_id,
+            "file_id": self.file_id,
+            "destination_path": self.destination_path,
+            "state": self.state,
+            "streamed": self.streamed_to is not None,
+            "progress": self.progress,
+            "error": self.error,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "download_seconds": self.stage_seconds[STAGE_DOWNLOAD],
+            "extract_seconds": self.stage_seconds[STAGE_EXTRACT],
+            "handoff_wait_seconds": self.handoff_wait_seconds
+        }
 
 
 class DownloadQueue:
-    def __init__(self, all_downloads_complete_callback=None):
+    """
+    Two-stage download pipeline. Download workers fetch files and hand them to
+    extraction workers through a bounded queue, so the network keeps transferring
+    the next pack while earlier packs are being decompressed.
+
+    Progress and completion callbacks are not called from the worker threads. They are
+    queued and run by process_events, which the GUI calls from the Tk thread.
+    """
+    def __init__(self, all_downloads_complete_callback=None, max_workers=MAX_CONCURRENT_DOWNLOADS,
+                 max_extract_workers=MAX_CONCURRENT_EXTRACTIONS, extract_queue_size=EXTRACT_QUEUE_SIZE):
         self.queue = Queue()
-        self.is_downloading = False
+        self.extract_queue = Queue(maxsize=max(1, extract_queue_size))
+        self.max_workers = max(1, max_workers)
+        self.max_extract_workers = max(1, max_extract_workers)
+        self.workers = []
+        self.extract_workers = []
+        self.jobs = {}
+        self.lock = threading.Lock()
         self.total_downloads = 0
         self.completed_downloads = 0
+        self._next_job_id = 0
         self.all_downloads_complete_callback = all_downloads_complete_callback
-        logging.info("Download queue initialized")
+        self.events = Queue()
+        logging.info(f"Download queue initialized with {self.max_workers} download workers and {self.max_extract_workers} extraction workers")
 
-    def add_to_queue(self, file_id, destination_path, download_method, progress_callback=None, completion_callback=None):
+    @property
+    def is_downloading(self):
+        """Whether any job in the current batch is still in the pipeline."""
+        with self.lock:
+            return self.completed_downloads < self.total_downloads
+
+    def add_to_queue(self, file_id, destination_path, download_method, progress_callback=None, completion_callback=None, stream_method=None):
         """
         Add a download task to the queue.
 
         :param file_id: File ID to be downloaded.
         :param destination_path: Path where the downloaded file will be saved.
         :param download_method: The method to use for downloading the file.
-        :param progress_callback: Optional callback for download progress.
+        :param progress_callback: Optional callback for the combined progress of the current batch.
         :param completion_callback: Optional callback for download completion.
+        :param stream_method: Optional method that streams the file into a consumer. When given,
+            .zip packs are extracted as they download instead of being saved first.
+        :return: ID of the queued job.
         """
-        self.queue.put((file_id, destination_path, download_method, progress_callback, completion_callback))
-        self.total_downloads += 1
+        with self.lock:
+            # A new batch starts once the previous one has been fully reported
+            if self.total_downloads == 0:
+                self.jobs = {}
+            self._next_job_id += 1
+            job = DownloadJob(self._next_job_id, file_id, destination_path, download_method, progress_callback, completion_callback, stream_method)
+            self.jobs[job.job_id] = job
+            self.total_downloads += 1
+
+        self.queue.put(job)
         logging.info(f"Added file with ID {file_id} to download queue")
-        self.start_next_download()
+        self.start_workers()
+        return job.job_id
 
-    def start_next_download(self):
+    def start_workers(self):
         """
-        Start the next download in the queue if the queue is not empty and no other download is in progress.
+        Start download and extraction worker threads up to their concurrency limits.
         """
-        if not self.is_downloading and not self.queue.empty():
-            self.is_downloading = True
-            file_id, destination_path, download_method, progress_callback, completion_callback = self.queue.get()
-            threading.Thread(target=self.download_file, args=(file_id, destination_path, download_method, progress_callback, completion_callback)).start()
-            logging.info(f"Started download thread for file with ID {file_id}")
+        with self.lock:
+            while len(self.workers) < self.max_workers:
+                worker = threading.Thread(target=self.worker_loop, name=f"download-worker-{len(self.workers) + 1}", daemon=True)
+                self.workers.append(worker)
+                worker.start()
+                logging.info(f"Started download worker {worker.name}")
+
+            while len(self.extract_workers) < self.max_extract_workers:
+                worker = threading.Thread(target=self.extract_worker_loop, name=f"extract-worker-{len(self.extract_workers) + 1}", daemon=True)
+                self.extract_workers.append(worker)
+                worker.start()
+                logging.info(f"Started extraction worker {worker.name}")
 
-    def download_file(self, file_id, destination_path, download_method, progress_callback, completion_callback):
+    def worker_loop(self):
         """
-        Download a file.
+        Take jobs off the download queue and download them until the application exits.
+        """
+        while True:
+            job = self.queue.get()
+            try:
+                self.download_file(job)
+            finally:
+                self.queue.task_done()
 
-        :param file_id: File ID to be downloaded.
-        :param destination_path: Path where the downloaded file will be saved.
-        :param download_method: The method to use for downloading the file.
-        :param progress_callback: Optional callback for download progress.
-        :param completion_callback: Optional callback for download completion.
+    def extract_worker_loop(self):
+        """
+        Take downloaded jobs off the hand-off queue and extract them until the application exits.
+        """
+        while True:
+            job = self.extract_queue.get()
+            try:
+                self.extract_file(job)
+            finally:
+                self.extract_queue.task_done()
+
+    def download_file(self, job):
+        """
+        Download a file and hand it to the extraction stage.
+
+        :param job: The DownloadJob to run.
         """
         def on_progress(progress):
-            if progress_callback:
-                progress_callback(progress)
+            self.update_job_progress(job, progress)
+
+        self.set_job_state(job, JOB_DOWNLOADING)
+        logging.info(f"Started download for file with ID {job.file_id}")
 
         try:
-            download_method(file_id, destination_path, callback=on_progress)
-            self.download_complete(destination_path, completion_callback, None)
+            if STREAM_EXTRACT_ZIP and job.stream_method and job.destination_path.lower().endswith('.zip'):
+                self.stream_extract(job, on_progress)
+            else:
+                job.download_method(job.file_id, job.destination_path, callback=on_progress)
         except Exception as e:
-            logging.error(f'Error downloading file with ID {file_id}: {e}', exc_info=True)
-            if completion_callback:
-                completion_callback(False, str(e))
+            logging.error(f'Error downloading file with ID {job.file_id}: {e}', exc_info=True)
+            self.download_complete(job, str(e))
+            return
         finally:
-            self.is_downloading = False
-            self.start_next_download()
+            self.record_stage_time(job, STAGE_DOWNLOAD, time.time() - job.started_at)
+
+        self.set_job_state(job, JOB_WAITING_FOR_EXTRACT)
+        # Blocks when the extraction stage is backed up, which throttles the download workers
+        self.extract_queue.put(job)
+
+    def stream_extract(self, job, on_progress):
+        """
+        Extract a .zip pack straight from the download stream, without writing the archive to disk.
+        Falls back to a regular download if the archive layout cannot be streamed. Nothing is kept
+        for resuming, so an interrupted stream starts over; see STREAM_EXTRACT_ZIP.
 
-    def download_complete(self, destination_path, completion_callback, error=None):
+        :param job: The DownloadJob to run.
+        :param on_progress: Progress callback for the job.
+        """
+        extract_to = create_pack_directory(get_msu_dir(), extract_pack_name(job.destination_path))
+        extractor = StreamingZipExtractor(extract_to)
+        try:
+            job.stream_method(job.file_id, extractor.feed, callback=on_progress)
+            extractor.close()
+        except StreamingNotSupported as e:
+            logging.warning(f"Cannot extract {job.destination_path} while streaming ({e}), downloading the archive instead")
+            extractor.cleanup()
+            remove_empty_pack_directory(extract_to)
+            job.download_method(job.file_id, job.destination_path, callback=on_progress)
+            return
+        except Exception:
+            extractor.cleanup()
+            remove_empty_pack_directory(extract_to)
+            raise
+
+        job.streamed_to = extract_to
+
+    def extract_file(self, job):
+        """
+        Extract a downloaded file into the MSU directory.
+
+        :param job: The DownloadJob whose file finished downloading.
+        """
+        self.set_job_state(job, JOB_EXTRACTING)
+        extract_started = time.time()
+        try:
+            self.download_complete(job, None)
+        finally:
+            self.record_stage_time(job, STAGE_EXTRACT, time.time() - extract_started)
+
+    def download_complete(self, job, error=None):
         """
         Handle post-download actions and invoke completion callback.
 
-        :param destination_path: Path where the downloaded file was saved.
-        :param completion_callback: Callback for download completion.
+        :param job: The DownloadJob that finished downloading.
         :param error: Optional error message if download failed.
         """
-        self.completed_downloads += 1
         try:
-            if error is None:
+            if error is None and job.streamed_to:
+                move_files_from_nested_dir(job.streamed_to)
+                logging.info(f"Download complete, file streamed to {job.streamed_to}")
+                self.set_job_state(job, JOB_COMPLETE)
+
+                self.notify(job.completion_callback, True)
+            elif error is None:
                 msu_dir = get_msu_dir()
-                extract_msu(destination_path, msu_dir)
+                extract_msu(job.destination_path, msu_dir)
                 logging.info(f"Download complete, file extracted to {msu_dir}")
+                self.set_job_state(job, JOB_COMPLETE)
 
-                if completion_callback:
-                    completion_callback(True)
+                self.notify(job.completion_callback, True)
             else:
                 logging.error(f"Error occurred during download: {error}")
-                completion_callback(False, error)
+                self.set_job_state(job, JOB_FAILED, error)
+                self.notify(job.completion_callback, False, error)
         except Exception as e:
             logging.error(f'Error occurred during file extraction: {e}', exc_info=True)
-            if completion_callback:
-                completion_callback(False, e)
+            self.set_job_state(job, JOB_FAILED, str(e))
+            self.notify(job.completion_callback, False, e)
         finally:
-            if self.completed_downloads == self.total_downloads:
-                if self.all_downloads_complete_callback:
-                    self.all_downloads_complete_callback()
-                self.reset_download_tracking()
+            self.update_job_progress(job, 100)
+            with self.lock:
+                self.completed_downloads += 1
+                batch_finished = self.completed_downloads == self.total_downloads
+                if batch_finished:
+                    self.reset_download_tracking()
+
+            if batch_finished:
+                logging.info(f"Download batch finished, stage timings: {self.get_stage_stats()}")
+                self.notify(self.all_downloads_complete_callback)
+
+    def notify(self, callback, *args):
+        """
+        Queue a callback for process_events.
+
+        :param callback: Callback to run, or None.
+        :param args: Arguments for the callback.
+        """
+        if callback:
+            self.events.put((callback, args))
+
+    def process_events(self):
+        """
+        Run the progress and completion callbacks queued by the workers. Call this from the
+        thread that owns the GUI.
+        """
+        while True:
+            try:
+                callback, args = self.events.get_nowait()
+            except Empty:
+                return
+            try:
+                callback(*args)
+            except Exception as e:
+                logging.error(f"Download callback failed: {e}", exc_info=True)
+
+    def set_job_state(self, job, state, error=None):
+        """
+        Update the state of a job.
+
+        :param job: The DownloadJob to update.
+        :param state: New job state.
+        :param error: Optional error message for failed jobs.
+        """
+        with self.lock:
+            job.state = state
+            if state == JOB_DOWNLOADING:
+                job.started_at = time.time()
+            elif state == JOB_WAITING_FOR_EXTRACT:
+                job.downloaded_at = time.time()
+            elif state == JOB_EXTRACTING:
+                job.handoff_wait_seconds = time.time() - job.downloaded_at
+            elif state in (JOB_COMPLETE, JOB_FAILED):
+                job.finished_at = time.time()
+                job.error = error
+
+    def record_stage_time(self, job, stage, seconds):
+        """
+        Record how long a job spent in a pipeline stage.
+
+        :param job: The DownloadJob to update.
+        :param stage: STAGE_DOWNLOAD or STAGE_EXTRACT.
+        :param seconds: Time spent in the stage.
+        """
+        with self.lock:
+            job.stage_seconds[stage] = seconds
+
+    def get_stage_stats(self):
+        """
+        Summarizes per-stage timings for the current batch. The stage with the highest
+        busy time per worker is the bottleneck; a large hand-off wait means downloads are
+        outpacing extraction.
+
+        :return: Dictionary keyed by stage name.
+        """
+        with self.lock:
+            jobs = list(self.jobs.values())
+            workers = {STAGE_DOWNLOAD: self.max_workers, STAGE_EXTRACT: self.max_extract_workers}
+
+        stats = {}
+        for stage in (STAGE_DOWNLOAD, STAGE_EXTRACT):
+            durations = [job.stage_seconds[stage] for job in jobs if job.stage_seconds[stage] is not None]
+            busy_seconds = sum(durations)
+            stats[stage] = {
+                "workers": workers[stage],
+                "jobs": len(durations),
+                "busy_seconds": busy_seconds,
+                "busy_seconds_per_worker": busy_seconds / workers[stage],
+                "average_seconds": busy_seconds / len(durations) if durations else 0.0,
+                "max_seconds": max(durations) if durations else 0.0
+            }
+
+        waits = [job.handoff_wait_seconds for job in jobs if job.handoff_wait_seconds is not None]
+        stats["handoff_wait"] = {
+            "jobs": len(waits),
+            "average_seconds": sum(waits) / len(waits) if waits else 0.0,
+            "max_seconds": max(waits) if waits else 0.0
+        }
+        return stats
+
+    def update_job_progress(self, job, progress):
+        """
+        Record the progress of a job and report the combined progress of the batch.
+
+        :param job: The DownloadJob reporting progress.
+        :param progress: Progress of the job as a percentage.
+        """
+        with self.lock:
+            job.progress = progress
+            batch_progress = sum(j.progress for j in self.jobs.values()) / max(len(self.jobs), 1)
+
+        self.notify(job.progress_callback, int(batch_progress))
+
+    def get_job_states(self):
+        """
+        Returns a snapshot of every job in the current batch.
+
+        :return: List of job state dictionaries.
+        """
+        with self.lock:
+            return [job.to_dict() for job in self.jobs.values()]
 
     def reset_download_tracking(self):
-        """Resets the download tracking variables."""
+        """Resets the download tracking variables. Callers must hold the lock."""
         self.total_downloads = 0
         self.completed_downloads = 0
-        self.is_downloading = False
 
     def is_queue_empty(self):
         """
-        Check if the download queue is empty.
+        Check if the download and extraction queues are empty.
         :return: Current status of queue
         """
-        return self.queue.empty()
+        return self.queue.empty() and self.extract_queue.empty()
@@ -0,0 +1,189 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import logging
+import os
+import sys
+import time
+import zipfile
+
+import py7zr
+import rarfile
+
+from config import EXTRACTION_MEMORY_BUDGET, EXTRACTION_WORKERS
+from utilities.file_management import IGNORED_ARCHIVE_ENTRIES, extract_msu
+
+# Batch extraction for the command line. The GUI extracts each download as it arrives through
+# the extraction stage of utilities/download_queue.py instead.
+
+ARCHIVE_EXTENSIONS = ('.zip', '.7z', '.rar')
+
+# Rough peak memory of one extraction. zipfile inflates one entry at a time, while py7zr
+# keeps decoder state for a whole solid block, which can approach the archive size.
+BASE_EXTRACTION_MEMORY = 64 * 1024 * 1024 # 64 MB
+
+
+class ExtractionResult:
+    """
+    Outcome of extracting a single archive.
+    """
+    def __init__(self, archive_path, pack_dir=None, bytes_written=0, duration=0.0, error=None):
+        self.archive_path = archive_path
+        self.pack_dir = pack_dir
+        self.bytes_written = bytes_written
+        self.duration = duration
+        self.error = error
+
+    @property
+    def succeeded(self):
+        return self.error is None
+
+    def to_dict(self):
+        """
+        Returns the result as a dictionary.
+
+        :return: Dictionary describing the result.
+        """
+        return {
+            "archive_path": self.archive_path,
+            "pack_dir": self.pack_dir,
+            "bytes_written": self.bytes_written,
+            "duration": self.duration,
+            "error": self.error
+        }
+
+
+def estimate_extraction_memory(archive_path):
+    """
+    Estimates the peak memory needed to extract an archive.
+
+    :param archive_path: The path to the archive file.
+    :return: Estimated memory in bytes.
+    """
+    if archive_path.lower().endswith('.7z'):
+        return BASE_EXTRACTION_MEMORY + os.path.getsize(archive_path)
+    return BASE_EXTRACTION_MEMORY
+
+
+def get_uncompressed_size(archive_path):
+    """
+    Returns the total uncompressed size of the files in an archive, read from its headers.
+    Archiver metadata folders are skipped, since they are not kept after extraction.
+
+    :param archive_path: The path to the archive file.
+    :return: Size in bytes.
+    """
+    extension = os.path.splitext(archive_path)[1].lower()
+    if extension == '.zip':
+        with zipfile.ZipFile(archive_path) as zip_ref:
+            members = [(info.filename, info.file_size) for info in zip_ref.infolist() if not info.is_dir()]
+    elif extension == '.7z':
+        with py7zr.SevenZipFile(archive_path, mode='r') as z_ref:
+            members = [(info.filename, info.uncompressed) for info in z_ref.list() if not info.is_directory]
+    elif extension == '.rar':
+        with rarfile.RarFile(archive_path) as r_ref:
+            members = [(info.filename, info.file_size) for info in r_ref.infolist() if not info.is_dir()]
+    else:
+        return 0
+    return sum(size for name, size in members if name.replace('\\', '/').split('/', 1)[0] not in IGNORED_ARCHIVE_ENTRIES)
+
+
+def _extract_in_worker(archive_path, master_msu_dir, remove_archive):
+    """
+    Extracts one archive inside a worker process.
+
+    Errors are returned as strings rather than raised, since not every archive library
+    exception can be pickled back to the parent process.
+    """
+    started = time.perf_counter()
+    try:
+        # Read before extracting, as the archive may be removed afterwards
+        bytes_written = get_uncompressed_size(archive_path)
+        pack_dir = extract_msu(archive_path, master_msu_dir, remove_archive=remove_archive)
+        return ExtractionResult(archive_path, pack_dir, bytes_written, time.perf_counter() - started)
+    except Exception as e:
+        return ExtractionResult(archive_path, duration=time.perf_counter() - started, error=f"{type(e).__name__}: {e}")
+
+
+def extract_archives(archive_paths, master_msu_dir, max_workers=EXTRACTION_WORKERS, memory_budget=EXTRACTION_MEMORY_BUDGET,
+                     remove_archives=True, on_result=None):
+    """
+    Extracts several archives in parallel across a process pool.
+
+    Archives are only started while the estimated memory of everything in flight stays
+    within the budget. An archive larger than the whole budget still runs, but on its own.
+
+    :param archive_paths: Paths to the archive files.
+    :param master_msu_dir: The master MSU directory.
+    :param max_workers: Number of worker processes, defaults to one per CPU core.
+    :param memory_budget: Total estimated memory allowed across running extractions.
+    :param remove_archives: Delete each archive once it has been extracted.
+    :param on_result: Optional function called with each ExtractionResult as it finishes.
+    :return: List of ExtractionResult in the same order as archive_paths.
+    """
+    results = {}
+    pending = list(archive_paths)
+    in_flight = {}
+    in_flight_memory = 0
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        while pending or in_flight:
+            while pending:
+                estimate = estimate_extraction_memory(pending[0])
+                if in_flight and in_flight_memory + estimate > memory_budget:
+                    break
+                archive_path = pending.pop(0)
+                future = executor.submit(_extract_in_worker, archive_path, master_msu_dir, remove_archives)
+                in_flight[future] = (archive_path, estimate)
+                in_flight_memory += estimate
+                logging.info(f"Extracting {archive_path} (~{estimate // (1024 * 1024)} MB, {in_flight_memory // (1024 * 1024)} MB in flight)")
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                archive_path, estimate = in_flight.pop(future)
+                in_flight_memory -= estimate
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # The worker process itself died, e.g. out of memory
+                    result = ExtractionResult(archive_path, error=f"{type(e).__name__}: {e}")
+                results[archive_path] = result
+
+                if result.succeeded:
+                    logging.info(f"Extracted {archive_path}: {result.bytes_written} bytes in {result.duration:.1f}s")
+                else:
+                    logging.error(f"Failed to extract {archive_path}: {result.error}")
+                if on_result:
+                    on_result(result)
+
+    logging.info(f"Extracted {len(results)} archives in {time.perf_counter() - started:.1f}s")
+    return [results[archive_path] for archive_path in archive_paths]
+
+
+def find_archives(folder):
+    """
+    Lists the MSU pack archives in a folder.
+
+    :param folder: Folder to search.
+    :return: Sorted list of archive paths.
+    """
+    return sorted(os.path.join(folder, file) for file in os.listdir(folder) if file.lower().endswith(ARCHIVE_EXTENSIONS))
+
+
+def extract_folder(folder, master_msu_dir, **kwargs):
+    """
+    Extracts every MSU pack archive in a folder in parallel.
+
+    :param folder: Folder containing the archives.
+    :param master_msu_dir: The master MSU directory.
+    :return: List of ExtractionResult.
+    """
+    return extract_archives(find_archives(folder), master_msu_dir, **kwargs)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s:%(levelname)s:%(message)s')
+    if len(sys.argv) != 3:
+        print("Usage: python -m utilities.extraction_engine <archive folder> <MSU master folder>")
+        sys.exit(1)
+    for result in extract_folder(sys.argv[1], sys.argv[2], remove_archives=False):
+        print(result.to_dict())
@@ -12,6 +12,11 @@ import yaml
 
 from config import BASE_DIR, PRESETS_DIR
 from database.operations import get_user_settings
+from utilities.msu_library import lookup_msu_pack
+from utilities.rom_placement import place_rom
+
+# Metadata folders added by macOS archivers, never part of an MSU pack
+IGNORED_ARCHIVE_ENTRIES = ('__MACOSX',)
 
 def get_msu_dir():
     """Retrieve the MSU directory path from user settings."""
@@ -38,51 +43,11 @@ def get_download_dir():
         logging.error("An error occurred: %s", str(e))
         raise
 
-def get_sfc_files():
-    """Get a list of .sfc files in the download directory."""
-    download_path = get_download_dir()
-    try:
-        download_files = os.listdir(download_path)
-        sfc_files = [file for file in download_files if file.endswith('.sfc')]
-        logging.info("SFC files retrieved: %s", sfc_files)
-        return sfc_files
-    except FileNotFoundError:
-        logging.error("The directory %s does not exist.", download_path)
-        raise
-    except Exception as e:
-        logging.exception("An unexpected error occurred: %s", e)
-        raise
-
-def get_msus():
-    """Get list of MSU folders."""
-    msus_dir = get_msu_dir()
-    try:
-        # Create directory if it doesn't exist
-        os.makedirs(msus_dir, exist_ok=True)
-        
-        msu_entries = os.listdir(msus_dir)
-        return [entry for entry in msu_entries 
-                if os.path.isdir(os.path.join(msus_dir, entry))]
-    except Exception as e:
-        logging.error(f"Error getting MSUs: {e}")
-        return []
-
 def get_msu_name_convention(msu_name):
     """Get the naming convention of MSU files within a given MSU folder."""
     msus_dir = get_msu_dir()
     try:
-        full_msu_path = os.path.join(msus_dir, msu_name)
-        msu_file_found = False
-        naming_convention = None
-
-        for file in os.listdir(full_msu_path):
-            if file.endswith(".msu"):
-                msu_file_found = True
-                naming_convention = os.path.splitext(file)[0]
-                break
-            elif file.endswith(".pcm") and not msu_file_found:
-                if file.count("-") == 1:
-                    naming_convention = file.split('-', 1)[0]
+        naming_convention = lookup_msu_pack(msus_dir, msu_name)["naming_convention"]
 
         if naming_convention:
             return naming_convention
@@ -98,25 +63,15 @@ def get_msu_name_convention(msu_name):
         raise
 
 
-def rmv_existing_sfc(msu_name, naming_conv):
-    msus_dir = get_msu_dir()
-    try:
-        full_msu_dir = get_full_msu_dir(msu_name)
-        existing_sfc = f"{naming_conv}.sfc"
-        full_path_to_msu = os.path.join(full_msu_dir, existing_sfc)
-
-        if os.path.exists(full_path_to_msu):
-            logging.info("Removing existing SFC file: %s", full_path_to_msu)
-            os.remove(full_path_to_msu)
-    except FileNotFoundError:
-        logging.error("File or directory not found: %s", full_path_to_msu)
-        raise
-    except Exception as e:
-        logging.exception("An error occurred while trying to delete the existing .sfc file: %s", e)
-        raise
-    
 def move_file(current_path, new_path):
-    shutil.move(current_path, new_path)
+    """
+    Moves a file to a new path, replacing any file already there atomically.
+
+    :param current_path: Path of the file to move.
+    :param new_path: Path to move it to.
+    :return: How the file was placed, see utilities/rom_placement.place_rom.
+    """
+    return place_rom(current_path, new_path)
 
 def get_full_msu_dir(msu_name):
     msus_dir = get_msu_dir()
@@ -147,28 +102,78 @@ def create_pack_directory(master_msu_dir, pack_name):
         os.makedirs(pack_dir)
     return pack_dir
 
-def extract_msu(file_path, master_msu_dir):
+def remove_empty_pack_directory(pack_dir):
+    """
+    Removes a pack directory left empty by a failed extraction, so it is not listed as a pack.
+
+    :param pack_dir: The pack directory.
+    """
+    try:
+        os.rmdir(pack_dir)
+    except OSError:
+        # Not empty, e.g. the pack was already installed before this archive
+        pass
+
+def common_member_prefix(member_names):
+    """
+    Finds the folder path shared by every member of an archive, e.g. 'Pack Name/' for a pack
+    that was zipped together with its parent folder.
+
+    :param member_names: Names of the archive members.
+    :return: The shared prefix including its trailing '/', or '' if there is none.
+    """
+    dir_parts = []
+    for name in member_names:
+        parts = name.replace('\\', '/').rstrip('/').split('/')
+        dir_parts.append(parts if name.endswith('/') else parts[:-1])
+
+    common = os.path.commonprefix(dir_parts)
+    return '/'.join(common) + '/' if common else ''
+
+def extract_zip_members(zip_ref, extract_to):
+    """
+    Extracts a zip archive with the common top-level folder stripped, so files land directly
+    in the pack directory instead of being moved there afterwards.
+
+    :param zip_ref: Open ZipFile.
+    :param extract_to: The pack directory.
+    """
+    members = [info for info in zip_ref.infolist() if info.filename.split('/', 1)[0] not in IGNORED_ARCHIVE_ENTRIES]
+    prefix = common_member_prefix([info.filename for info in members])
+    if prefix:
+        logging.info("Stripping common folder %s while extracting", prefix)
+
+    for info in members:
+        # zipfile checks the local header against orig_filename, so renaming is safe
+        info.filename = info.filename[len(prefix):]
+        if info.filename:
+            zip_ref.extract(info, extract_to)
+
+def extract_msu(file_path, master_msu_dir, remove_archive=True):
     """
     Extracts an MSU pack archive to a new directory within the master MSU directory.
     
     :param file_path: The path to the archive file.
     :param master_msu_dir: The master MSU directory.
+    :param remove_archive: Delete the archive once it has been extracted. A failed archive is kept.
+    :return: The path to the pack directory.
     """
     pack_name = extract_pack_name(file_path)
     extract_to = create_pack_directory(master_msu_dir, pack_name)
     seven_zip_path = os.path.join(BASE_DIR, '7z/7z.exe')
+    extension = os.path.splitext(file_path)[1].lower()
     
     try:
-        if file_path.endswith('.zip'):
+        if extension == '.zip':
             with zipfile.ZipFile(file_path, 'r') as zip_ref:
-                zip_ref.extractall(extract_to)
-        elif file_path.endswith('.7z'):
+                extract_zip_members(zip_ref, extract_to)
+        elif extension == '.7z':
             if platform.system() == 'Windows':
                 subprocess.check_call([seven_zip_path, 'x', '-o' + extract_to, file_path])
             else:
                 with py7zr.SevenZipFile(file_path, mode='r') as z_ref:
                     z_ref.extractall(extract_to)
-        elif file_path.endswith('.rar'):
+        elif extension == '.rar':
             if platform.system() == 'Windows':
                 subprocess.check_call([seven_zip_path, 'x', '-o' + extract_to, file_path])
             else:
@@ -179,39 +184,56 @@ def extract_msu(file_path, master_msu_dir):
             raise ValueError("Unsupported archive format.")
     except subprocess.CalledProcessError as e:
         logging.error("7-Zip failed to extract file: %s", e)
+        remove_empty_pack_directory(extract_to)
         raise
     except Exception as e:
         logging.exception("Failed to extract MSU pack: %s", e)
+        remove_empty_pack_directory(extract_to)
         raise
-    finally:
+
+    if remove_archive:
         logging.info("Removing archive file: %s", file_path)
         os.remove(file_path)
     
-    # After extraction, check for nested directory and move files if necessary
+    # Zip packs are flattened while extracting; other formats may still need one pass
     move_files_from_nested_dir(extract_to)
+    return extract_to
 
 def move_files_from_nested_dir(extract_to):
     """
-    Moves files from a nested directory to the intended directory if needed.
+    Moves the files in every subfolder of a pack up into the pack directory, so the .msu and
+    .pcm files are found whatever folders the pack was archived in. Files are moved with
+    os.replace, so nothing is copied, and the emptied folders are removed. Where two files
+    share a name, the one nearest the pack directory is kept there.
+
+    :param extract_to: The pack directory the archive was extracted into.
     """
     try:
-        for root, dirs, files in os.walk(extract_to):
-            for file in files:
-                file_path = os.path.join(root, file)
-                if root != extract_to: 
-                    shutil.move(file_path, extract_to)
-                    logging.info("Moved file from %s to %s", file_path, extract_to)
-
-            for dir in dirs:
-                dir_path = os.path.join(root, dir)
-                if dir_path != extract_to and root != extract_to:
-                    new_dir_path = os.path.join(extract_to, dir)
-                    shutil.move(dir_path, new_dir_path)
-                    logging.info("Moved directory from %s to %s", dir_path, new_dir_path)
+        for junk in IGNORED_ARCHIVE_ENTRIES:
+            junk_path = os.path.join(extract_to, junk)
+            if os.path.isdir(junk_path):
+                shutil.rmtree(junk_path)
 
+        nested_files = []
+        for root, dirs, files in os.walk(extract_to):
+            if root != extract_to:
+                nested_files.extend(os.path.join(root, file) for file in files)
+        if not nested_files:
+            return
+
+        moved = 0
+        for file_path in sorted(nested_files, key=lambda path: path.count(os.sep)):
+            new_path = os.path.join(extract_to, os.path.basename(file_path))
+            if os.path.exists(new_path):
+                logging.warning("Not moving %s, %s already exists", file_path, new_path)
+                continue
+            os.replace(file_path, new_path)
+            moved += 1
+
+        for root, dirs, files in os.walk(extract_to, topdown=False):
             if root != extract_to and not os.listdir(root):
                 os.rmdir(root)
-                logging.info("Removed empty directory: %s", root)
+        logging.info("Moved %d files from nested directories into %s", moved, extract_to)
     except Exception as e:
         logging.exception("An error occurred while moving files from nested directories: %s", e)
-        raise
\ No newline at end of file
+        raise
@@ -0,0 +1,319 @@
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+
+from config import FS_WATCH_POLL_INTERVAL_SECONDS
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+EVENT_HEADER = struct.Struct('iIII')
+
+# Watched collections
+SFC_FILES = 'sfc_files'
+MSU_FOLDERS = 'msu_folders'
+
+
+def is_sfc_file(name, is_dir):
+    return not is_dir and name.endswith('.sfc')
+
+
+def is_msu_folder(name, is_dir):
+    return is_dir
+
+
+class _Inotify:
+    """
+    Minimal ctypes wrapper around the Linux inotify API.
+    """
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path, mask):
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        return wd
+
+    def remove_watch(self, wd):
+        self._rm_watch(self.fd, wd)
+
+    def read_events(self, timeout):
+        """
+        Waits up to timeout seconds and returns the pending (wd, mask, name) events.
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return []
+            raise
+
+        events = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, name_length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + name_length].rstrip(b'\0'))
+            offset += name_length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FileSystemWatcher:
+    """
+    Background service keeping sorted snapshots of the .sfc files in the download directory and
+    the pack folders in the MSU master directory, so screens can read them without listing either
+    directory. Uses inotify on Linux and falls back to polling directory modification times.
+    """
+    def __init__(self, poll_interval=FS_WATCH_POLL_INTERVAL_SECONDS):
+        self.poll_interval = poll_interval
+        self.lock = threading.Lock()
+        self.paths = {SFC_FILES: None, MSU_FOLDERS: None}
+        self.filters = {SFC_FILES: is_sfc_file, MSU_FOLDERS: is_msu_folder}
+        self.entries = {SFC_FILES: set(), MSU_FOLDERS: set()}
+        self.snapshots = {SFC_FILES: (), MSU_FOLDERS: ()}
+        self.mtimes = {SFC_FILES: None, MSU_FOLDERS: None}
+        self.listeners = []
+        self.watches = {}
+        self.paths_changed = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.inotify = None
+
+    def start(self, download_dir, msu_master_dir):
+        """
+        Scan both directories once and start watching them in the background.
+
+        :param download_dir: Directory containing downloaded .sfc files.
+        :param msu_master_dir: Directory containing the MSU pack folders.
+        """
+        self.set_paths(download_dir, msu_master_dir)
+        if sys.platform.startswith('linux'):
+            try:
+                self.inotify = _Inotify()
+            except (OSError, AttributeError) as e:
+                logging.warning(f"inotify unavailable, polling for file changes instead: {e}")
+
+        self.thread = threading.Thread(target=self.run, name="fs-watcher", daemon=True)
+        self.thread.start()
+        logging.info(f"File system watcher started using {'inotify' if self.inotify else 'polling'}")
+
+    def stop(self):
+        """Stop the background thread."""
+        self.stopped.set()
+        self.paths_changed.set()
+        if self.thread:
+            self.thread.join(timeout=self.poll_interval + 1)
+        if self.inotify:
+            self.inotify.close()
+            self.inotify = None
+
+    def set_paths(self, download_dir, msu_master_dir):
+        """
+        Point the watcher at new directories, e.g. after the settings were saved.
+
+        :param download_dir: Directory containing downloaded .sfc files.
+        :param msu_master_dir: Directory containing the MSU pack folders.
+        """
+        with self.lock:
+            self.paths = {SFC_FILES: download_dir, MSU_FOLDERS: msu_master_dir}
+        for collection in self.paths:
+            self.rescan(collection)
+        self.paths_changed.set()
+
+    def add_listener(self, callback):
+        """
+        Register a function called from the watcher thread with the name of a collection whenever it changes.
+
+        :param callback: Function taking SFC_FILES or MSU_FOLDERS.
+        """
+        self.listeners.append(callback)
+
+    def sfc_files(self):
+        """Returns the sorted .sfc file names in the download directory."""
+        return self.snapshots[SFC_FILES]
+
+    def msu_folders(self):
+        """Returns the sorted pack folder names in the MSU master directory."""
+        return self.snapshots[MSU_FOLDERS]
+
+    def rescan(self, collection):
+        """
+        List a watched directory and replace its collection.
+
+        :param collection: SFC_FILES or MSU_FOLDERS.
+        """
+        path = self.paths[collection]
+        entries = set()
+        mtime = None
+        try:
+            mtime = os.stat(path).st_mtime
+            with os.scandir(path) as dir_entries:
+                for entry in dir_entries:
+                    if self.filters[collection](entry.name, entry.is_dir()):
+                        entries.add(entry.name)
+        except OSError as e:
+            logging.warning(f"Could not scan {path}: {e}")
+
+        self.publish(collection, path, lambda current: entries, mtime=mtime)
+
+    def publish(self, collection, path, update, mtime=None):
+        """
+        Update a collection through update_entries, notifying listeners if anything changed.
+        """
+        if self.update_entries(collection, path, update, mtime=mtime):
+            self.notify(collection)
+
+    def update_entries(self, collection, path, update, mtime=None):
+        """
+        Replace a collection and its snapshot under the lock. Nothing happens if the collection
+        was pointed at another directory since path was read, so results for an old directory
+        never overwrite those for the new one.
+
+        :param collection: SFC_FILES or MSU_FOLDERS.
+        :param path: Directory the update was made from.
+        :param update: Function taking the current entries and returning the new set.
+        :param mtime: Modification time of the directory if it was listed.
+        :return: True if the collection changed.
+        """
+        with self.lock:
+            if self.paths[collection] != path:
+                return False
+            if mtime is not None:
+                self.mtimes[collection] = mtime
+            entries = update(self.entries[collection])
+            if entries == self.entries[collection]:
+                return False
+            self.entries[collection] = entries
+            self.snapshots[collection] = tuple(sorted(entries, key=str.lower))
+        logging.debug(f"{collection} updated: {len(entries)} entries")
+        return True
+
+    def notify(self, collection):
+        """Call every listener with the name of a collection that changed."""
+        for listener in self.listeners:
+            try:
+                listener(collection)
+            except Exception as e:
+                logging.error(f"File system watcher listener failed: {e}", exc_info=True)
+
+    def apply_event(self, collection, path, mask, name):
+        """
+        Update a collection from a single inotify event without listing the directory.
+
+        :param path: Watched directory the event came from.
+        """
+        is_dir = bool(mask & IN_ISDIR)
+        if not self.filters[collection](name, is_dir):
+            return
+
+        def update(current):
+            entries = set(current)
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                entries.add(name)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                entries.discard(name)
+            return entries
+
+        self.publish(collection, path, update)
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                if self.inotify:
+                    self.run_inotify()
+                else:
+                    self.poll()
+            except Exception as e:
+                logging.error(f"File system watcher error, falling back to polling: {e}", exc_info=True)
+                if self.inotify:
+                    self.inotify.close()
+                    self.inotify = None
+
+    def poll(self):
+        """Rescan any directory whose modification time changed since the last scan."""
+        self.paths_changed.wait(self.poll_interval)
+        self.paths_changed.clear()
+        for collection, path in list(self.paths.items()):
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                mtime = None
+            if mtime != self.mtimes[collection]:
+                self.rescan(collection)
+
+    def run_inotify(self):
+        """Watch both directories with inotify until the paths change or the watcher stops."""
+        self.paths_changed.clear()
+        for wd in self.watches:
+            self.inotify.remove_watch(wd)
+        self.watches = {}
+        unwatched = []
+        for collection, path in list(self.paths.items()):
+            try:
+                # Both settings may point at the same directory, which shares one watch
+                self.watches.setdefault(self.inotify.add_watch(path, WATCH_MASK), []).append((collection, path))
+            except OSError as e:
+                logging.warning(f"Cannot watch {path}: {e}")
+                unwatched.append(collection)
+        # Catch anything that changed between the last scan and the watches being added
+        for watched in self.watches.values():
+            for collection, _ in watched:
+                self.rescan(collection)
+
+        while not self.stopped.is_set() and not self.paths_changed.is_set():
+            for wd, mask, name in self.inotify.read_events(self.poll_interval):
+                if mask & IN_Q_OVERFLOW:
+                    for collection in self.paths:
+                        self.rescan(collection)
+                    continue
+                for collection, path in self.watches.get(wd, []):
+                    if path != self.paths[collection]:
+                        # Event for a directory set_paths has replaced; the watches are rebuilt next
+                        continue
+                    if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                        # The directory itself went away, watch it again once it is back
+                        self.rescan(collection)
+                        self.paths_changed.set()
+                    else:
+                        self.apply_event(collection, path, mask, name)
+
+            # Keep checking for directories that could not be watched until they exist
+            for collection in unwatched:
+                if os.path.isdir(self.paths[collection]):
+                    self.rescan(collection)
+                    self.paths_changed.set()
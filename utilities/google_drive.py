@@ -1,39 +1,468 @@
-import io
+from concurrent.futures import ThreadPoolExecutor
 import logging
-import re
+import math
+import os
+import threading
+import time
 
-from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
-from utilities.google_services import get_drive_service
+import requests
+from googleapiclient.errors import HttpError
+from config import (DOWNLOAD_MAX_RETRIES, DOWNLOAD_RETRY_BACKOFF_SECONDS, DRIVE_ADAPTIVE_CHUNKING,
+                    DRIVE_CHUNK_SIZE, DRIVE_DOWNLOAD_SEGMENTS, DRIVE_MAX_CHUNK_SIZE,
+                    PROGRESS_UPDATE_INTERVAL_SECONDS)
+from utilities.download_manifest import DownloadManifest
+from utilities.google_services import get_authorized_session, get_drive_service, get_http_pool
+from utilities.log_setup import RATE_LIMITED
 
+PARTIAL_SUFFIX = '.part'
+MANIFEST_SUFFIX = '.part.json'
 
-class GoogleDriveData:
+
+class RangeNotSupported(IOError):
+    """Raised when a server answers a ranged request with the whole file."""
+
+
+def parse_content_range(content_range):
+    """
+    Parses the total size out of a Content-Range header such as 'bytes 0-1023/4096'.
+
+    :param content_range: Value of the Content-Range header.
+    :return: Total size in bytes, or None if the size is unknown.
+    """
     try:
-        service = get_drive_service()
-        logging.info("Google Drive service established")
-    except Exception as e:
-        logging.error(f"Error when establishing connection to Google Drive: {e}")
+        total = content_range.rsplit('/', 1)[1]
+        return None if total == '*' else int(total)
+    except (IndexError, ValueError):
+        return None
+
+
+def split_ranges(ranges, segments):
+    """
+    Splits [start, end) ranges into pieces of roughly equal size so they can be fetched in parallel.
+
+    :param ranges: List of (start, end) tuples still to be downloaded.
+    :param segments: Number of parallel connections.
+    :return: List of (start, end) tuples.
+    """
+    remaining = sum(end - start for start, end in ranges)
+    if remaining == 0:
+        return []
+    segment_size = max(1, math.ceil(remaining / max(1, segments)))
+
+    pieces = []
+    for start, end in ranges:
+        while start < end:
+            pieces.append((start, min(start + segment_size, end)))
+            start += segment_size
+    return pieces
+
+
+def probe_size(session, uri):
+    """
+    Finds the size of a remote file with a one-byte ranged request. The response is streamed
+    and only its headers are read, so a server that ignores the range does not send the file.
+
+    :param session: requests-compatible session.
+    :param uri: URI of the file.
+    :return: Size of the file in bytes.
+    :raises RangeNotSupported: If the server does not honour Range requests.
+    """
+    with session.get(uri, headers={'Range': 'bytes=0-0'}, stream=True) as resp:
+        if resp.status_code == 416:
+            return 0
+        if resp.status_code == 200:
+            raise RangeNotSupported(f"Server ignored the Range header for {uri}")
+        if resp.status_code != 206 or 'Content-Range' not in resp.headers:
+            raise IOError(f"Size probe of {uri} failed with HTTP {resp.status_code}")
+        content_range = resp.headers['Content-Range']
+
+    total_size = parse_content_range(content_range)
+    if total_size is None:
+        raise IOError(f"Server did not report the size of {uri}")
+    return total_size
+
+
+def download_ranges(uri, destination_path, http_pool, manifest_id=None, callback=None,
+                    segments=DRIVE_DOWNLOAD_SEGMENTS, chunk_size=DRIVE_CHUNK_SIZE, session=None,
+                    adaptive=DRIVE_ADAPTIVE_CHUNKING):
+    """
+    Downloads a file over several connections at once. The file is preallocated and each
+    segment writes its bytes at their own offset, with completed ranges recorded in the same
+    sidecar manifest used by GoogleDriveData.download_file, so interrupted downloads resume.
+
+    :param uri: URI of the file. The server must honour Range requests.
+    :param destination_path: Local path to save the downloaded file.
+    :param http_pool: HttpPool each segment borrows its own client from.
+    :param manifest_id: Identifier stored in the manifest, defaults to the URI.
+    :param callback: Optional function to be called with the combined download progress.
+    :param segments: Number of parallel connections.
+    :param chunk_size: Size of the first ranged request of each segment in bytes.
+    :param session: requests-compatible session for the size probe, unauthenticated by default.
+    :param adaptive: Grow each segment's chunk size while its throughput keeps rising.
+    :raises RangeNotSupported: If the server does not honour Range requests.
+    """
+    partial_path = destination_path + PARTIAL_SUFFIX
+    manifest = DownloadManifest.load(destination_path + MANIFEST_SUFFIX, manifest_id or uri, partial_path)
+
+    if manifest.total_size is None:
+        manifest.total_size = probe_size(session or requests.Session(), uri)
+
+    mode = 'r+b' if os.path.exists(partial_path) else 'wb'
+    with open(partial_path, mode) as fh:
+        fh.truncate(manifest.total_size)
+
+    progress = ProgressThrottle(callback)
+    progress_lock = threading.Lock()
+    downloaded = [manifest.completed_bytes()]
+
+    def on_chunk(num_bytes):
+        with progress_lock:
+            downloaded[0] += num_bytes
+            if manifest.total_size:
+                progress.report(int(downloaded[0] / manifest.total_size * 100))
+
+    def fetch_segment(segment):
+        start, end = segment
+        # Each connection has its own throughput, so each segment sizes its own requests
+        sizer = AdaptiveChunkSizer(chunk_size, adaptive=adaptive)
+        attempt = 0
+        while True:
+            try:
+                # A failed request discards its client, so a retry starts on a fresh connection
+                with http_pool.connection() as http:
+                    _fetch_range(http, uri, partial_path, manifest, start, end, sizer, on_chunk)
+                return
+            except RangeNotSupported:
+                raise
+            except Exception as e:
+                resume_at = manifest.first_missing_offset(start, end)
+                # Retries are limited per streak of failures; any progress starts a new streak
+                if resume_at > start:
+                    attempt = 0
+                start = resume_at
+                if attempt == DOWNLOAD_MAX_RETRIES:
+                    raise
+                delay = DOWNLOAD_RETRY_BACKOFF_SECONDS * (2 ** attempt)
+                logging.warning(f"Segment {segment[0]}-{end} of {uri} interrupted at byte {start}, retrying in {delay}s: {e}")
+                attempt += 1
+                time.sleep(delay)
+
+    pieces = split_ranges(manifest.missing_ranges(), segments)
+    logging.info(f"Downloading {uri} in {len(pieces)} segments over {segments} connections")
+    with ThreadPoolExecutor(max_workers=max(1, segments)) as executor:
+        # list() re-raises the first segment failure once every segment has stopped
+        list(executor.map(fetch_segment, pieces))
+
+    if not manifest.is_complete():
+        raise IOError(f"Segmented download of {uri} finished with missing ranges {manifest.missing_ranges()}")
+
+    os.replace(partial_path, destination_path)
+    manifest.delete()
+    with progress_lock:
+        progress.report(100, force=True)
+
+
+def _fetch_range(http, uri, partial_path, manifest, start, end, sizer, on_chunk):
+    """
+    Fetches the bytes in [start, end) chunk by chunk and writes them at their offset, with
+    the chunk size chosen by an AdaptiveChunkSizer.
+    """
+    with open(partial_path, 'r+b') as fh:
+        while start < end:
+            last_byte = min(start + sizer.chunk_size, end) - 1
+            chunk_started = time.monotonic()
+            resp, content = http.request(uri, 'GET', headers={'range': f'bytes={start}-{last_byte}'})
+            if resp.status == 200:
+                raise RangeNotSupported(f"Server ignored the Range header for {uri}")
+            if resp.status != 206:
+                raise HttpError(resp, content, uri=uri)
+            if not content:
+                raise IOError(f"Empty response for bytes {start}-{last_byte} of {uri}")
+
+            content = content[:end - start]
+            fh.seek(start)
+            fh.write(content)
+            fh.flush()
+            manifest.add_range(start, start + len(content))
+            manifest.save()
+            start += len(content)
+            sizer.record(len(content), time.monotonic() - chunk_started)
+            on_chunk(len(content))
+
+
+class AdaptiveChunkSizer:
+    """
+    Picks the size of the next ranged request. In adaptive mode the chunk doubles for as long
+    as throughput keeps rising, and settles once a larger chunk stops paying off.
+    """
+    GROWTH_THRESHOLD = 1.05 # Throughput must improve by at least 5% to keep growing
+
+    def __init__(self, chunk_size=DRIVE_CHUNK_SIZE, max_chunk_size=DRIVE_MAX_CHUNK_SIZE, adaptive=DRIVE_ADAPTIVE_CHUNKING):
+        self.chunk_size = chunk_size
+        self.max_chunk_size = max(chunk_size, max_chunk_size)
+        self.adaptive = adaptive
+        self.best_throughput = 0.0
+        self.settled = not adaptive
+
+    def record(self, num_bytes, seconds):
+        """
+        Records how long a chunk took and grows the next chunk if throughput is still rising.
+
+        :param num_bytes: Size of the chunk that was fetched.
+        :param seconds: Time taken to fetch it.
+        """
+        if self.settled or seconds <= 0 or num_bytes < self.chunk_size:
+            return
+
+        throughput = num_bytes / seconds
+        if throughput > self.best_throughput * self.GROWTH_THRESHOLD and self.chunk_size < self.max_chunk_size:
+            self.best_throughput = throughput
+            self.chunk_size = min(self.chunk_size * 2, self.max_chunk_size)
+            logging.debug(f"Throughput {throughput / 1024 / 1024:.1f} MB/s, growing chunk size to {self.chunk_size} bytes")
+        else:
+            self.settled = True
+            logging.debug(f"Chunk size settled at {self.chunk_size} bytes")
+
+
+class ProgressThrottle:
+    """
+    Rate-limits progress callbacks so a fast transfer does not flood the UI thread and the log.
+    """
+    def __init__(self, callback, interval=PROGRESS_UPDATE_INTERVAL_SECONDS):
+        self.callback = callback
+        self.interval = interval
+        self.last_report_time = 0.0
+        self.last_progress = None
+
+    def report(self, progress, force=False):
+        """
+        Passes progress on to the callback if the interval has elapsed.
+
+        :param progress: Progress as a percentage.
+        :param force: Report regardless of the interval, e.g. for the final update.
+        :return: True if the progress was reported.
+        """
+        now = time.monotonic()
+        if progress == self.last_progress or (not force and now - self.last_report_time < self.interval):
+            return False
+
+        self.last_report_time = now
+        self.last_progress = progress
+        if self.callback:
+            self.callback(progress)
+        return True
+
+
+class GoogleDriveData:
+    service = None
+
+    @classmethod
+    def get_service(cls):
+        """
+        Returns the Google Drive service, creating it on first use.
+        """
+        if cls.service is None:
+            cls.service = get_drive_service()
+        return cls.service
 
     @classmethod
-    def download_file(cls, file_id, destination_path, callback=None):
+    def download_file(cls, file_id, destination_path, callback=None, chunk_size=DRIVE_CHUNK_SIZE, adaptive=DRIVE_ADAPTIVE_CHUNKING):
         """
         Downloads a file from Google Drive.
 
+        The file is written to '<destination_path>.part' with a sidecar manifest of the byte
+        ranges already on disk. If the transfer fails, it is retried from the last good offset,
+        and a later call with the same destination resumes instead of starting from byte 0.
+
         :param file_id: ID of the file to be downloaded.
         :param destination_path: Local path to save the downloaded file.
         :param callback: Optional function to be called with the download progress.
+        :param chunk_size: Size of each ranged request in bytes.
+        :param adaptive: Grow the chunk size while throughput keeps rising.
+        """
+        partial_path = destination_path + PARTIAL_SUFFIX
+        manifest = DownloadManifest.load(destination_path + MANIFEST_SUFFIX, file_id, partial_path)
+        sizer = AdaptiveChunkSizer(chunk_size, adaptive=adaptive)
+        progress = ProgressThrottle(callback)
+
+        attempt = 0
+        failed_at = None
+        while True:
+            try:
+                cls._download_to_partial(file_id, partial_path, manifest, sizer, progress)
+                break
+            except Exception as e:
+                offset = manifest.next_offset()
+                # Retries are limited per streak of failures; any progress starts a new streak
+                if failed_at is not None and offset > failed_at:
+                    attempt = 0
+                failed_at = offset
+                if attempt == DOWNLOAD_MAX_RETRIES:
+                    logging.error(f"Error downloading the file: {e}")
+                    raise
+                delay = DOWNLOAD_RETRY_BACKOFF_SECONDS * (2 ** attempt)
+                logging.warning(f"Download of {file_id} interrupted at byte {offset}, retrying in {delay}s: {e}")
+                attempt += 1
+                time.sleep(delay)
+
+        os.replace(partial_path, destination_path)
+        manifest.delete()
+        logging.info(f"File downloaded successfully to {destination_path}")
+
+    @classmethod
+    def download_file_segmented(cls, file_id, destination_path, callback=None, segments=DRIVE_DOWNLOAD_SEGMENTS, chunk_size=DRIVE_CHUNK_SIZE,
+                                adaptive=DRIVE_ADAPTIVE_CHUNKING):
+        """
+        Downloads a file from Google Drive over several parallel connections.
+
+        :param file_id: ID of the file to be downloaded.
+        :param destination_path: Local path to save the downloaded file.
+        :param callback: Optional function to be called with the combined download progress.
+        :param segments: Number of parallel connections.
+        :param chunk_size: Size of the first ranged request of each segment in bytes.
+        :param adaptive: Grow each segment's chunk size while its throughput keeps rising.
         """
+        if segments <= 1:
+            return cls.download_file(file_id, destination_path, callback=callback, chunk_size=chunk_size, adaptive=adaptive)
+
+        uri = cls.get_service().files().get_media(fileId=file_id).uri
         try:
-            request = cls.service.files().get_media(fileId=file_id)
-
-            with io.FileIO(destination_path, 'wb') as fh:
-                downloader = MediaIoBaseDownload(fh, request)
-                done = False
-                while not done:
-                    status, done = downloader.next_chunk()
-                    progress = int(status.progress() * 100)
-                    logging.info(f"Downloading chunk: {status.resumable_progress}/{status.total_size} - Progress: {progress}%")
-                    if callback:
-                        callback(int(status.progress() * 100))
-            logging.info(f"File downloaded successfully to {destination_path}")
+            download_ranges(uri, destination_path, get_http_pool(), manifest_id=file_id, callback=callback,
+                            segments=segments, chunk_size=chunk_size, session=get_authorized_session(), adaptive=adaptive)
+        except RangeNotSupported as e:
+            # The single-stream download accepts a whole-file response and shares the manifest
+            logging.warning(f"{e}, downloading {file_id} over a single connection")
+            return cls.download_file(file_id, destination_path, callback=callback, chunk_size=chunk_size, adaptive=adaptive)
         except Exception as e:
             logging.error(f"Error downloading the file: {e}")
+            raise
+        logging.info(f"File downloaded successfully to {destination_path}")
+
+    @classmethod
+    def stream_file(cls, file_id, consumer, callback=None, chunk_size=DRIVE_CHUNK_SIZE, adaptive=DRIVE_ADAPTIVE_CHUNKING):
+        """
+        Streams a file from Google Drive into a consumer without writing it to disk.
+
+        Failed requests are retried from the current offset, but nothing survives an
+        application restart; use download_file when the transfer must be resumable.
+
+        :param file_id: ID of the file to be streamed.
+        :param consumer: Function called with each chunk of bytes, in order.
+        :param callback: Optional function to be called with the download progress.
+        :param chunk_size: Size of each ranged request in bytes.
+        :param adaptive: Grow the chunk size while throughput keeps rising.
+        """
+        uri = cls.get_service().files().get_media(fileId=file_id).uri
+        http_pool = get_http_pool()
+        http = None
+        sizer = AdaptiveChunkSizer(chunk_size, adaptive=adaptive)
+        progress = ProgressThrottle(callback)
+        offset = 0
+        total_size = None
+        attempt = 0
+
+        try:
+            while total_size is None or offset < total_size:
+                if http is None:
+                    http = http_pool.acquire()
+                chunk_size = sizer.chunk_size
+                headers = {'range': f'bytes={offset}-{offset + chunk_size - 1}'}
+                chunk_started = time.monotonic()
+                try:
+                    resp, content = http.request(uri, 'GET', headers=headers)
+                    if resp.status == 416 and offset == 0:
+                        break
+                    if resp.status != 206 and not (resp.status == 200 and offset == 0):
+                        raise HttpError(resp, content, uri=uri)
+                    if resp.status == 206 and not content:
+                        raise IOError(f"Empty response for bytes {offset}- of file {file_id}")
+                except Exception as e:
+                    http_pool.release(http, discard=True)
+                    http = None
+                    if attempt == DOWNLOAD_MAX_RETRIES:
+                        logging.error(f"Error streaming the file: {e}")
+                        raise
+                    delay = DOWNLOAD_RETRY_BACKOFF_SECONDS * (2 ** attempt)
+                    logging.warning(f"Stream of {file_id} interrupted at byte {offset}, retrying in {delay}s: {e}")
+                    attempt += 1
+                    time.sleep(delay)
+                    continue
+
+                if resp.status == 200:
+                    total_size = len(content)
+                elif 'content-range' in resp:
+                    total_size = parse_content_range(resp['content-range'])
+
+                consumer(content)
+                offset += len(content)
+                # Retries are limited per streak of failures; a good chunk starts a new streak
+                attempt = 0
+                sizer.record(len(content), time.monotonic() - chunk_started)
+
+                if total_size is None and len(content) < chunk_size:
+                    total_size = offset
+                if total_size and progress.report(int(offset / total_size * 100)):
+                    logging.debug(f"Streaming chunk: {offset}/{total_size}", extra=RATE_LIMITED)
+        finally:
+            if http is not None:
+                http_pool.release(http)
+
+        progress.report(100, force=True)
+        logging.info(f"File {file_id} streamed successfully")
+
+    @classmethod
+    def _download_to_partial(cls, file_id, partial_path, manifest, sizer, progress):
+        """
+        Fetches the missing tail of a file with ranged requests, recording each chunk in the manifest.
+
+        :param file_id: ID of the file to be downloaded.
+        :param partial_path: Path of the partial download.
+        :param manifest: DownloadManifest for the partial download.
+        :param sizer: AdaptiveChunkSizer choosing the size of each request.
+        :param progress: ProgressThrottle to report progress through.
+        """
+        uri = cls.get_service().files().get_media(fileId=file_id).uri
+        offset = manifest.next_offset()
+        mode = 'r+b' if os.path.exists(partial_path) else 'wb'
+
+        with get_http_pool().connection() as http, open(partial_path, mode) as fh:
+            while manifest.total_size is None or offset < manifest.total_size:
+                chunk_size = sizer.chunk_size
+                headers = {'range': f'bytes={offset}-{offset + chunk_size - 1}'}
+                chunk_started = time.monotonic()
+                resp, content = http.request(uri, 'GET', headers=headers)
+
+                if resp.status == 416 and offset == 0:
+                    # Range not satisfiable on the first byte means the file is empty
+                    manifest.total_size = 0
+                    break
+                if resp.status not in (200, 206):
+                    raise HttpError(resp, content, uri=uri)
+                if not content:
+                    raise IOError(f"Empty response for bytes {offset}- of file {file_id}")
+
+                if resp.status == 200:
+                    # The server ignored the range and sent the whole file
+                    offset = 0
+                    fh.truncate(0)
+                    manifest.reset(len(content))
+                elif 'content-range' in resp:
+                    manifest.total_size = parse_content_range(resp['content-range'])
+
+                fh.seek(offset)
+                fh.write(content)
+                fh.flush()
+                manifest.add_range(offset, offset + len(content))
+                manifest.save()
+                offset += len(content)
+                sizer.record(len(content), time.monotonic() - chunk_started)
+
+                if manifest.total_size is None:
+                    if len(content) < chunk_size:
+                        manifest.total_size = offset
+                    continue
+
+                if manifest.total_size and progress.report(int(offset / manifest.total_size * 100)):
+                    logging.debug(f"Downloading chunk: {offset}/{manifest.total_size}", extra=RATE_LIMITED)
+
+        progress.report(100, force=True)
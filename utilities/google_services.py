@@ -1,14 +1,25 @@
 import os
 import pickle
 import logging
+import threading
 
+from contextlib import contextmanager
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.exceptions import RefreshError
-from google.auth.transport.requests import Request
+from google.auth.transport.requests import AuthorizedSession, Request
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
+from googleapiclient.http import build_http
 
 # Import from config file
-from config import TOKEN_PATH, CLIENT_SECRETS_FILE, GOOGLE_SCOPES
+from config import TOKEN_PATH, CLIENT_SECRETS_FILE, GOOGLE_SCOPES, HTTP_POOL_MAX_IDLE
+
+# Credentials and services are created on first use and shared by every caller
+_credentials = None
+_services = {}
+_services_lock = threading.Lock()
+# Serializes authentication, which may wait minutes for the user in the browser
+_auth_lock = threading.Lock()
 
 def authenticate_service():
     """
@@ -54,24 +65,173 @@ def authenticate_service():
 
     return creds
 
+def get_credentials():
+    """
+    Return the shared Google API credentials, authenticating on first use.
+
+    :return: Authenticated Google API credentials.
+    """
+    global _credentials
+    with _services_lock:
+        credentials = _credentials
+    if credentials is not None:
+        return credentials
+
+    # Only callers that need credentials wait for the OAuth flow; services already built stay available
+    with _auth_lock:
+        with _services_lock:
+            credentials = _credentials
+        if credentials is None:
+            credentials = authenticate_service()
+            with _services_lock:
+                _credentials = credentials
+    return credentials
+
+def get_service(name, version):
+    """
+    Create a Google API service object on first use and return the same object afterwards.
+
+    The discovery document bundled with googleapiclient is used, so building a service
+    never fetches it over the network.
+
+    :param name: API name, e.g. 'drive'.
+    :param version: API version, e.g. 'v3'.
+    :return: Google API service object.
+    """
+    with _services_lock:
+        service = _services.get((name, version))
+    if service is not None:
+        return service
+
+    service = build(name, version, credentials=get_credentials(), static_discovery=True, cache_discovery=False)
+    with _services_lock:
+        # Another thread may have built the same service in the meantime; keep the first one
+        if (name, version) not in _services:
+            _services[(name, version)] = service
+            logging.info(f"Google {name} {version} service created")
+        return _services[(name, version)]
+
 def get_drive_service():
     """
-    Create and return a Google Drive service object.
+    Return the shared Google Drive service object.
 
     :return: Google Drive service object.
     """
-    creds = authenticate_service()
-    service = build('drive', 'v3', credentials=creds)
-    logging.info("Google Drive service created")
-    return service
+    return get_service('drive', 'v3')
 
 def get_sheets_service():
     """
-    Create and return a Google Sheets service object.
+    Return the shared Google Sheets service object.
 
     :return: Google Sheets service object.
     """
-    creds = authenticate_service()
-    service = build('sheets', 'v4', credentials=creds)
-    logging.info("Google Sheets service created")
-    return service
\ No newline at end of file
+    return get_service('sheets', 'v4')
+
+def warm_up_services():
+    """
+    Build the Drive and Sheets services on a background thread, so the first screen that
+    needs them does not wait. Skipped when there is no saved token, since authenticating
+    would open the browser for a user who may never use these screens.
+    """
+    if not os.path.exists(TOKEN_PATH):
+        logging.info("No saved Google credentials, services will be created on first use")
+        return
+
+    def build_services():
+        try:
+            get_drive_service()
+            get_sheets_service()
+        except Exception as e:
+            logging.error(f"Error when establishing connection to Google services: {e}")
+
+    threading.Thread(target=build_services, name="google-services", daemon=True).start()
+
+def get_authorized_http():
+    """
+    Create and return a new authorized HTTP client.
+
+    httplib2 clients are not thread-safe, so each thread that talks to Google
+    APIs directly needs its own.
+
+    :return: Authorized httplib2 client.
+    """
+    return AuthorizedHttp(get_credentials(), http=build_http())
+
+def get_authorized_session():
+    """
+    Create and return a new authorized requests session, for requests that must stream the
+    response instead of reading the whole body like httplib2 does.
+
+    :return: Authorized requests session.
+    """
+    return AuthorizedSession(get_credentials())
+
+class HttpPool:
+    """
+    Thread-safe pool of HTTP clients.
+
+    A client is only ever used by the thread that borrowed it, and idle clients keep their
+    connections open, so later requests reuse them instead of repeating the TLS handshake.
+    """
+    def __init__(self, factory, max_idle=HTTP_POOL_MAX_IDLE):
+        self.factory = factory
+        self.max_idle = max_idle
+        self.lock = threading.Lock()
+        self.idle = []
+        self.created = 0
+
+    def acquire(self):
+        """
+        Borrow an idle client, or create a new one if none is idle.
+
+        :return: httplib2-compatible client.
+        """
+        with self.lock:
+            if self.idle:
+                return self.idle.pop()
+            self.created += 1
+        return self.factory()
+
+    def release(self, http, discard=False):
+        """
+        Return a borrowed client to the pool.
+
+        :param http: Client returned by acquire.
+        :param discard: Close the client instead, e.g. after an error left its connection in an unknown state.
+        """
+        if not discard:
+            with self.lock:
+                if len(self.idle) < self.max_idle:
+                    self.idle.append(http)
+                    return
+        http.close()
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a client for the duration of a with block.
+        """
+        http = self.acquire()
+        try:
+            yield http
+        except BaseException:
+            self.release(http, discard=True)
+            raise
+        self.release(http)
+
+    def clear(self):
+        """Close every idle client."""
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for http in idle:
+            http.close()
+
+_http_pool = HttpPool(get_authorized_http)
+
+def get_http_pool():
+    """
+    Return the shared pool of authorized HTTP clients used for Google API requests.
+
+    :return: HttpPool.
+    """
+    return _http_pool
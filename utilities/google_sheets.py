@@ -1,25 +1,47 @@
 import google.auth
+import threading
 import time
 import logging
 
 from googleapiclient.discovery import build
 
 from config import FETCH_TIMEOUT_IN_SECONDS, MSU_SHEET_ID
-from utilities.google_services import get_sheets_service
+from database.operations import get_catalog_cache, save_catalog_cache, touch_catalog_cache
+from utilities.google_services import get_drive_service, get_http_pool, get_sheets_service
+from utilities.msu_catalog import MsuCatalog
 
 class GoogleSheetsData:
     """
     Class to interact with Google Sheets data, specifically for fetching and caching MSU data.
     """
     _data_cache = None
+    _catalog = MsuCatalog([])
     _last_fetched_time = None
+    _modified_time = None
+    _refresh_lock = threading.Lock()
+    _refresh_thread = None
 
-    try:
-        service = get_sheets_service()
-        sheet = service.spreadsheets()
-        logging.info("Google Sheets service established")
-    except Exception as e:
-        logging.error(f"Error when establishing connection to Google Sheets: {e}")
+    sheet = None
+    # Used to read the spreadsheet's modification time without downloading it
+    drive_service = None
+
+    @classmethod
+    def get_sheet(cls):
+        """
+        Returns the spreadsheets resource of the Google Sheets service, creating it on first use.
+        """
+        if cls.sheet is None:
+            cls.sheet = get_sheets_service().spreadsheets()
+        return cls.sheet
+
+    @classmethod
+    def get_drive(cls):
+        """
+        Returns the Google Drive service, creating it on first use.
+        """
+        if cls.drive_service is None:
+            cls.drive_service = get_drive_service()
+        return cls.drive_service
 
     @classmethod
     def convert_to_dict(cls, list_of_vals):
@@ -39,49 +61,163 @@ class GoogleSheetsData:
 
         return data_as_dict
 
+    @classmethod
+    def _set_data(cls, values, fetched_at, modified_time=None):
+        """
+        Replaces the cached data with the given sheet rows and rebuilds the catalog index,
+        reusing the entries of rows that did not change.
+
+        :param values: Rows of the sheet, the first of which is the header.
+        :param fetched_at: Time the rows were fetched.
+        :param modified_time: Modification time of the spreadsheet the rows were read at.
+        :return: The new MsuCatalog.
+        """
+        catalog = MsuCatalog(values, previous=cls._catalog)
+        # Swap the catalog in before the list so readers never see entries without an index
+        cls._catalog = catalog
+        cls._data_cache = catalog.entries
+        cls._last_fetched_time = fetched_at
+        cls._modified_time = modified_time
+        return catalog
+
+    @classmethod
+    def load_cached_data(cls):
+        """
+        Loads the MSU data saved by the last successful fetch, so it is available without
+        contacting Google Sheets.
+
+        :return: True if cached data was loaded.
+        """
+        cached = get_catalog_cache()
+        if not cached:
+            return False
+        fetched_at, payload = cached
+        cls._set_data(payload.get('values', []), fetched_at, payload.get('modified_time'))
+        logging.info(f"Loaded {len(cls._data_cache)} MSU entries cached at {time.ctime(fetched_at)}")
+        return True
+
+    @classmethod
+    def is_loaded(cls):
+        """
+        Checks whether MSU data is in memory, whether fetched or loaded from the database.
+        """
+        return cls._data_cache is not None
+
+    @classmethod
+    def is_refreshing(cls):
+        """
+        Checks whether a background refresh is running.
+        """
+        return cls._refresh_thread is not None and cls._refresh_thread.is_alive()
+
+    @classmethod
+    def is_stale(cls):
+        """
+        Checks whether the data is missing or older than FETCH_TIMEOUT_IN_SECONDS.
+        """
+        return cls._last_fetched_time is None or (time.time() - cls._last_fetched_time) > FETCH_TIMEOUT_IN_SECONDS
+
+    @classmethod
+    def _get_modified_time(cls):
+        """
+        Reads the modification time of the spreadsheet from Google Drive.
+
+        :return: RFC 3339 timestamp, or None if it could not be read.
+        """
+        try:
+            with get_http_pool().connection() as http:
+                metadata = cls.get_drive().files().get(fileId=MSU_SHEET_ID, fields="modifiedTime").execute(http=http)
+            return metadata.get('modifiedTime')
+        except Exception as e:
+            logging.warning(f"Could not read the modification time of the Google Sheet: {e}")
+            return None
+
     @classmethod
     def _fetch_data_from_sheet(cls):
         """
-        Fetches all data from the Google Sheet and updates the cache.
+        Refreshes the data from the Google Sheet and saves it to the database. The values are
+        only downloaded if the spreadsheet was modified since the last fetch, and only the
+        rows that changed are rebuilt.
 
         :return: Data fetched from the sheet as a list of dictionaries.
         """
+        modified_time = cls._get_modified_time()
+        if modified_time and modified_time == cls._modified_time and cls._data_cache is not None:
+            fetched_at = time.time()
+            cls._last_fetched_time = fetched_at
+            logging.info(f"Google Sheet unchanged since {modified_time}, keeping cached data")
+            try:
+                touch_catalog_cache(fetched_at)
+            except Exception as e:
+                logging.error(f"Error saving MSU data to the database: {e}")
+            return cls._data_cache
+
         try:
-            result = cls.sheet.values().get(spreadsheetId=MSU_SHEET_ID, range="A:J").execute()
+            # The refresh runs on a background thread, so it borrows its own client from the pool
+            with get_http_pool().connection() as http:
+                result = cls.get_sheet().values().get(spreadsheetId=MSU_SHEET_ID, range="A:J").execute(http=http)
             values = result.get('values', [])
-            cls._data_cache = cls.convert_to_dict(values)
-            cls._last_fetched_time = time.time()
-            logging.info("Data fetched from Google Sheet")
-            return cls._data_cache
+            fetched_at = time.time()
+            catalog = cls._set_data(values, fetched_at, modified_time)
+            logging.info(f"Data fetched from Google Sheet: {len(catalog.added)} added, {len(catalog.changed)} changed, "
+                         f"{len(catalog.removed)} removed")
         except Exception as e:
             logging.error(f"Error fetching data from Google Sheet: {e}")
             return []
 
+        try:
+            save_catalog_cache(fetched_at, {'values': values, 'modified_time': modified_time})
+        except Exception as e:
+            logging.error(f"Error saving MSU data to the database: {e}")
+        return cls._data_cache
+
+    @classmethod
+    def refresh_in_background(cls, callback=None):
+        """
+        Fetches fresh data from the Google Sheet on a background thread. Does nothing if a
+        refresh is already running.
+
+        :param callback: Optional function called from the background thread once the fetch finished.
+        """
+        def refresh():
+            cls._fetch_data_from_sheet()
+            if callback:
+                callback()
+
+        with cls._refresh_lock:
+            if cls.is_refreshing():
+                return
+            cls._refresh_thread = threading.Thread(target=refresh, name="sheets-refresh", daemon=True)
+            cls._refresh_thread.start()
+        logging.info("Refreshing MSU data from Google Sheet in the background")
+
     @classmethod
     def get_all_data(cls):
         """
-        Determines whether to use cached data or fetch fresh data from Google Sheet.
+        Returns the MSU data, loading it from the database if it is not in memory yet. Stale
+        data is returned as is while a background refresh runs; the sheet is only fetched in
+        the foreground if nothing has ever been cached.
 
         :return: List of MSU data.
         """
-        current_time = time.time()
+        if cls._data_cache is None:
+            cls.load_cached_data()
 
-        if cls._data_cache is None or (current_time - cls._last_fetched_time) > FETCH_TIMEOUT_IN_SECONDS:
+        if cls._data_cache is None:
             cls._fetch_data_from_sheet()
+        elif cls.is_stale():
+            cls.refresh_in_background()
 
         return cls._data_cache or []
 
     @classmethod
     def get_msu_names(cls):
         """
-        Fetches a list of all MSU names from the cached Google Sheet data.
+        Returns the names of all MSU packs with a download link.
 
         :return: List of MSU names.
         """
-        if cls._data_cache:
-            # return [entry['Pack Name'] for entry in cls._data_cache if entry['Download'].startswith("https://drive")]
-            return [entry['Pack Name'] for entry in cls._data_cache if entry['Download'].startswith("https://") or entry['Download'].startswith("http://")]
-        return []
+        return list(cls._catalog.downloadable_names)
 
     @classmethod
     def get_download_link(cls, msu_name):
@@ -91,10 +227,17 @@ class GoogleSheetsData:
         :param msu_name: Name of the MSU pack.
         :return: Download link for the specified MSU pack.
         """
-        if cls._data_cache:
-            for entry in cls._data_cache:
-                if entry['Pack Name'] == msu_name:
-                    return entry['Download']
+        return cls._catalog.get_download_link(msu_name)
+
+    @classmethod
+    def get_file_id(cls, msu_name):
+        """
+        Given an MSU name, returns the Google Drive file ID of its download.
+
+        :param msu_name: Name of the MSU pack.
+        :return: File ID, or None if the pack is not hosted on Google Drive.
+        """
+        return cls._catalog.get_file_id(msu_name)
 
     @classmethod
     def get_msu_data(cls, msu_names):
@@ -104,17 +247,15 @@ class GoogleSheetsData:
         :param msu_names: List of MSU names.
         :return: List of dictionaries with MSU data.
         """
-        if not cls._data_cache:
-            return []
-        
+        catalog = cls._catalog
         result = []
         for msu_name in msu_names:
-            for entry in cls._data_cache:
-                if entry['Pack Name'] == msu_name:
-                    result.append({
-                        'Pack Name': entry['Pack Name'],
-                        'Format': entry['Format'],
-                        'Download': entry['Download']
-                    })
-                    break
+            entry = catalog.get(msu_name)
+            if entry:
+                result.append({
+                    'Pack Name': entry['Pack Name'],
+                    'Format': entry['Format'],
+                    'Download': entry['Download'],
+                    'File ID': catalog.get_file_id(msu_name)
+                })
         return result
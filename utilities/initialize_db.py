@@ -4,6 +4,7 @@ import logging
 from config import BASE_DIR
 from database.session import Base, engine
 from database.models import Configuration
+from database.operations import invalidate_settings_cache
 from database.session import Session
 
 
@@ -35,4 +36,5 @@ def initialize_db():
             )
             session.add(default_config)
             session.commit()
+            invalidate_settings_cache()
             logging.info("Default configuration added to database")
@@ -0,0 +1,126 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+
+from config import (LOG_BACKUP_COUNT, LOG_FILE_PATH, LOG_LEVEL_PATH, LOG_MAX_BYTES, LOG_RATE_LIMIT_SECONDS,
+                    read_log_level)
+
+LOG_FORMAT = '%(asctime)s:%(levelname)s:%(message)s'
+
+# Pass as extra= on log calls in hot paths, e.g. once per chunk or progress update
+RATE_LIMITED = {'rate_limited': True}
+
+_listener = None
+_log_level_mtime = None
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets through at most one record per interval from each line that logs with RATE_LIMITED.
+    The next record let through from that line reports how many were dropped in between.
+    Records logged without RATE_LIMITED always pass.
+    """
+    def __init__(self, interval=LOG_RATE_LIMIT_SECONDS):
+        super().__init__()
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.last_emitted = {}
+        self.suppressed = {}
+
+    def filter(self, record):
+        if not getattr(record, 'rate_limited', False):
+            return True
+
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self.lock:
+            last = self.last_emitted.get(key)
+            if last is not None and now - last < self.interval:
+                self.suppressed[key] = self.suppressed.get(key, 0) + 1
+                return False
+            self.last_emitted[key] = now
+            suppressed = self.suppressed.pop(key, 0)
+
+        if suppressed:
+            record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+        return True
+
+
+def setup_logging(log_path=LOG_FILE_PATH, level=None):
+    """
+    Routes all logging through a queue to a rotating log file.
+
+    Threads that log only put the record on the queue; a single listener thread formats it
+    and writes it to disk, so downloads and the UI never wait on file I/O.
+
+    :param log_path: Path of the log file.
+    :param level: Log level name, defaults to the level in log_level.txt.
+    :return: The started QueueListener.
+    """
+    global _listener
+    file_handler = logging.handlers.RotatingFileHandler(log_path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+                                                        encoding='utf-8')
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(RateLimitFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    set_log_level(level or read_log_level())
+
+    _listener = logging.handlers.QueueListener(queue_handler.queue, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    _remember_log_level_mtime()
+    return _listener
+
+
+def stop_logging():
+    """Write out any queued records and stop the listener thread."""
+    global _listener
+    if _listener:
+        _listener.stop()
+        _listener = None
+
+
+def set_log_level(level):
+    """
+    Changes the log level while the application is running.
+
+    :param level: Level name such as 'DEBUG' or 'ERROR'.
+    """
+    level = level.strip().upper()
+    if not isinstance(logging.getLevelName(level), int):
+        logging.error(f"Unknown log level {level!r}, keeping {logging.getLevelName(logging.getLogger().level)}")
+        return
+    root = logging.getLogger()
+    if root.level != logging.getLevelName(level):
+        root.setLevel(level)
+        # Informational, so an ERROR level log only ever holds real errors
+        logging.info(f"Log level set to {level}")
+
+
+def _remember_log_level_mtime():
+    global _log_level_mtime
+    try:
+        _log_level_mtime = os.stat(LOG_LEVEL_PATH).st_mtime
+    except OSError:
+        _log_level_mtime = None
+
+
+def reload_log_level():
+    """
+    Applies the level in log_level.txt if the file changed since it was last read, so the
+    level can be changed without restarting the application.
+    """
+    previous = _log_level_mtime
+    _remember_log_level_mtime()
+    if _log_level_mtime is not None and _log_level_mtime != previous:
+        set_log_level(read_log_level())
@@ -0,0 +1,102 @@
+import re
+
+# Google Drive sharing link formats used in the MSU sheet
+DRIVE_LINK_PATTERNS = (
+    re.compile(r'^https?://drive\.google\.com/file/d/([^/]+)(/view\?.+)?'),
+    re.compile(r'^https?://drive\.google\.com/open\?id=([^/]+)$')
+)
+
+
+def extract_drive_file_id(link):
+    """
+    Extracts the file ID from a Google Drive sharing link.
+
+    :param link: Google Drive sharing link.
+    :return: File ID or None if the link is invalid.
+    """
+    if not link:
+        return None
+    for pattern in DRIVE_LINK_PATTERNS:
+        match = pattern.match(link)
+        if match:
+            return match.group(1)
+    return None
+
+
+def is_download_link(link):
+    """
+    Checks whether a Download column value is a web link rather than a note.
+    """
+    return link.startswith("https://") or link.startswith("http://")
+
+
+class MsuCatalog:
+    """
+    Indexed view of the MSU sheet, built once per fetch so lookups by pack name never
+    scan the entries.
+
+    When built from a previous catalog, rows that did not change keep their existing entry
+    and file ID, and the names of added, changed and removed packs are recorded.
+    """
+    def __init__(self, values=(), previous=None):
+        self.values = values
+        self.header = list(values[0]) if values else []
+        self.entries = []
+        self.rows = {}
+        self.by_name = {}
+        self.file_ids = {}
+        self.downloadable_names = []
+        self.added = []
+        self.changed = []
+        self.removed = []
+
+        if previous is not None and previous.header != self.header:
+            # Columns moved, so no previous row can be compared
+            previous = None
+        name_index = self.header.index('Pack Name') if 'Pack Name' in self.header else None
+
+        for row in values[1:]:
+            name = row[name_index] if name_index is not None and name_index < len(row) else None
+            # The sheet may list a pack twice; the first row wins, as with the old linear scans
+            if name is None or name in self.by_name:
+                self.entries.append(dict(zip(self.header, row)))
+                continue
+
+            previous_row = previous.rows.get(name) if previous else None
+            if previous_row == row:
+                entry = previous.by_name[name]
+                file_id = previous.file_ids[name]
+            else:
+                entry = dict(zip(self.header, row))
+                file_id = extract_drive_file_id(entry.get('Download'))
+                if previous:
+                    (self.added if previous_row is None else self.changed).append(name)
+
+            self.entries.append(entry)
+            self.rows[name] = row
+            self.by_name[name] = entry
+            self.file_ids[name] = file_id
+            if is_download_link(entry.get('Download', '')):
+                self.downloadable_names.append(name)
+
+        if previous:
+            self.removed = [name for name in previous.rows if name not in self.rows]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, msu_name):
+        """
+        Returns the entry for a pack, or None if it is not in the catalog.
+        """
+        return self.by_name.get(msu_name)
+
+    def get_download_link(self, msu_name):
+        entry = self.by_name.get(msu_name)
+        return entry.get('Download') if entry else None
+
+    def get_file_id(self, msu_name):
+        """
+        Returns the Google Drive file ID of a pack, or None if it must be downloaded manually.
+        """
+        return self.file_ids.get(msu_name)
@@ -0,0 +1,140 @@
+import logging
+import os
+import threading
+
+from database.operations import get_msu_pack, get_msu_pack_index, save_msu_pack_index
+
+
+def detect_naming_convention(file_names):
+    """
+    Get the naming convention of the MSU files in a pack from its file names.
+
+    :param file_names: Names of the files in the pack folder.
+    :return: The naming convention, or None if no .msu or valid .pcm file was found.
+    """
+    naming_convention = None
+    for file in file_names:
+        if file.endswith(".msu"):
+            return os.path.splitext(file)[0]
+        elif file.endswith(".pcm") and file.count("-") == 1:
+            naming_convention = file.split('-', 1)[0]
+    return naming_convention
+
+
+def scan_msu_pack(msu_master_dir, name, mtime):
+    """
+    Read the details of a single MSU pack folder.
+
+    :param msu_master_dir: Path to the MSU master directory.
+    :param name: Name of the pack folder.
+    :param mtime: Modification time of the pack folder.
+    :return: Dictionary of pack details.
+    """
+    file_names = []
+    track_count = 0
+    total_size = 0
+    with os.scandir(os.path.join(msu_master_dir, name)) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            file_names.append(entry.name)
+            total_size += entry.stat().st_size
+            if entry.name.endswith(".pcm"):
+                track_count += 1
+
+    return {
+        "name": name,
+        "naming_convention": detect_naming_convention(file_names),
+        "track_count": track_count,
+        "total_size": total_size,
+        "mtime": mtime
+    }
+
+
+def refresh_msu_index(msu_master_dir):
+    """
+    Bring the MSU pack index up to date and return it. Only packs whose folder modification
+    time changed since they were last indexed are scanned again.
+
+    :param msu_master_dir: Path to the MSU master directory.
+    :return: List of pack detail dictionaries sorted by name.
+    """
+    index = get_msu_pack_index(msu_master_dir)
+    packs = {}
+    updated = []
+
+    with os.scandir(msu_master_dir) as entries:
+        for entry in entries:
+            if not entry.is_dir():
+                continue
+            mtime = entry.stat().st_mtime
+            indexed = index.get(entry.name)
+            if indexed and indexed["mtime"] == mtime:
+                packs[entry.name] = indexed
+                continue
+            try:
+                packs[entry.name] = scan_msu_pack(msu_master_dir, entry.name, mtime)
+                updated.append(packs[entry.name])
+            except OSError as e:
+                logging.warning(f"Could not index MSU pack {entry.name}: {e}")
+
+    removed = [name for name in index if name not in packs]
+    if updated or removed:
+        save_msu_pack_index(msu_master_dir, updated, removed)
+
+    return [packs[name] for name in sorted(packs, key=str.lower)]
+
+
+def lookup_msu_pack(msu_master_dir, name):
+    """
+    Get the details of a single MSU pack, rescanning it only if its folder changed.
+
+    :param msu_master_dir: Path to the MSU master directory.
+    :param name: Name of the pack folder.
+    :return: Dictionary of pack details.
+    """
+    mtime = os.stat(os.path.join(msu_master_dir, name)).st_mtime
+    indexed = get_msu_pack(msu_master_dir, name)
+    if indexed and indexed["mtime"] == mtime:
+        return indexed
+
+    pack = scan_msu_pack(msu_master_dir, name, mtime)
+    save_msu_pack_index(msu_master_dir, [pack], [])
+    return pack
+
+
+class MsuIndexRefresher:
+    """
+    Runs refresh_msu_index on a background thread. Requests made while a refresh is running
+    are combined into a single refresh afterwards.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending_dir = None
+        self.thread = None
+
+    def request_refresh(self, msu_master_dir):
+        """
+        Refresh the index for an MSU master directory in the background.
+
+        :param msu_master_dir: Path to the MSU master directory.
+        """
+        with self.lock:
+            self.pending_dir = msu_master_dir
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="msu-index", daemon=True)
+                self.thread.start()
+
+    def run(self):
+        while True:
+            with self.lock:
+                msu_master_dir = self.pending_dir
+                self.pending_dir = None
+                if msu_master_dir is None:
+                    self.thread = None
+                    return
+            try:
+                packs = refresh_msu_index(msu_master_dir)
+                logging.info(f"MSU pack index refreshed: {len(packs)} packs")
+            except Exception as e:
+                logging.error(f"Could not refresh the MSU pack index for {msu_master_dir}: {e}", exc_info=True)
@@ -0,0 +1,115 @@
+import logging
+import os
+import threading
+
+import yaml
+
+from config import PRESETS_DIR
+
+PRESET_EXTENSIONS = ('.yaml', '.yml')
+
+# libyaml parses the large item pool and drop tables of some presets many times faster
+# than the pure Python loader; fall back to it when PyYAML was built without libyaml.
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+YAML_DUMPER = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+
+class PresetRegistry:
+    """
+    Maps preset names to their files and caches each parsed preset until its file changes.
+
+    Parsed presets are shared between callers and must not be modified in place.
+    """
+    def __init__(self, presets_dir=PRESETS_DIR, loader=YAML_LOADER):
+        self.presets_dir = presets_dir
+        self.loader = loader
+        self.lock = threading.Lock()
+        self.paths = None
+        self.cache = {}
+
+    def refresh(self):
+        """
+        Lists the presets directory again, e.g. after presets were added or removed.
+        """
+        paths = {}
+        with os.scandir(self.presets_dir) as entries:
+            for entry in entries:
+                name, ext = os.path.splitext(entry.name)
+                if ext in PRESET_EXTENSIONS and entry.is_file():
+                    paths[name] = entry.path
+        with self.lock:
+            self.paths = paths
+            self.cache = {name: cached for name, cached in self.cache.items() if name in paths}
+        logging.info(f"Found {len(paths)} presets")
+
+    def names(self):
+        """
+        Returns the sorted names of all presets.
+        """
+        if self.paths is None:
+            self.refresh()
+        return sorted(self.paths)
+
+    def path(self, preset_name):
+        """
+        Returns the path of a preset file, or None if there is no such preset.
+
+        :param preset_name: Name of the preset.
+        """
+        if self.paths is None or preset_name not in self.paths:
+            # The preset may have been added since the directory was listed
+            self.refresh()
+        return self.paths.get(preset_name)
+
+    def load(self, preset_name):
+        """
+        Returns the parsed contents of a preset, parsing the file only if its modification
+        time or size changed since it was last read.
+
+        :param preset_name: Name of the preset.
+        :return: Parsed preset, or None if there is no such preset.
+        """
+        path = self.path(preset_name)
+        if path is None:
+            return None
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.refresh()
+            return None
+
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = self.cache.get(preset_name)
+        if cached and cached[0] == key:
+            return cached[1]
+
+        with open(path, 'r') as preset_file:
+            content = yaml.load(preset_file, Loader=self.loader)
+        with self.lock:
+            self.cache[preset_name] = (key, content)
+        logging.debug(f"Parsed preset {preset_name}")
+        return content
+
+    def save(self, preset_name, content):
+        """
+        Writes a preset back to its file and keeps the written contents cached.
+
+        :param preset_name: Name of the preset.
+        :param content: Preset contents to write.
+        """
+        path = self.path(preset_name) or os.path.join(self.presets_dir, f"{preset_name}.yaml")
+        with open(path, 'w') as preset_file:
+            yaml.dump(content, preset_file, Dumper=YAML_DUMPER, default_flow_style=False)
+        stat = os.stat(path)
+        with self.lock:
+            if self.paths is not None:
+                self.paths[preset_name] = path
+            self.cache[preset_name] = ((stat.st_mtime_ns, stat.st_size), content)
+
+    def clear(self):
+        """Forgets every parsed preset."""
+        with self.lock:
+            self.cache = {}
+
+
+preset_registry = PresetRegistry()
@@ -0,0 +1,170 @@
+import errno
+import logging
+import os
+import shutil
+import time
+
+# Ways a ROM can be placed, returned by place_rom
+PLACED_BY_RENAME = 'rename'
+PLACED_BY_HARDLINK = 'hardlink'
+PLACED_BY_COPY = 'copy'
+
+# Errors meaning the kernel cannot do this copy for us, as opposed to a real I/O failure
+UNSUPPORTED_COPY_ERRORS = (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EPERM, errno.EBADF)
+MAX_KERNEL_COPY = 1024 * 1024 * 1024 # Bytes per copy_file_range/sendfile call
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def is_same_device(source_path, destination_dir):
+    """
+    Checks whether a file and a directory are on the same filesystem, so the file can be
+    renamed or hardlinked into the directory instead of copied.
+
+    :param source_path: Path of the file.
+    :param destination_dir: Path of the directory.
+    :return: True if both are on the same device.
+    """
+    return os.stat(source_path).st_dev == os.stat(destination_dir).st_dev
+
+
+def temp_path_for(destination_path):
+    """
+    Returns a temporary path next to the destination, on the same filesystem, from which
+    the finished file can be renamed into place atomically.
+    """
+    directory, name = os.path.split(destination_path)
+    return os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+
+
+def copy_file_data(source_fd, destination_fd, size):
+    """
+    Copies size bytes between two open files, letting the kernel move the data where it can:
+    copy_file_range first, then sendfile, then a plain buffered copy.
+
+    :param source_fd: File descriptor opened for reading.
+    :param destination_fd: File descriptor opened for writing.
+    :param size: Number of bytes to copy.
+    :return: Name of the method that finished the copy.
+    """
+    offset = 0
+
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while offset < size:
+                copied = os.copy_file_range(source_fd, destination_fd, min(size - offset, MAX_KERNEL_COPY), offset, offset)
+                if copied == 0:
+                    break
+                offset += copied
+            if offset >= size:
+                return 'copy_file_range'
+        except OSError as e:
+            if e.errno not in UNSUPPORTED_COPY_ERRORS:
+                raise
+
+    if hasattr(os, 'sendfile'):
+        try:
+            os.lseek(destination_fd, offset, os.SEEK_SET)
+            while offset < size:
+                sent = os.sendfile(destination_fd, source_fd, offset, min(size - offset, MAX_KERNEL_COPY))
+                if sent == 0:
+                    break
+                offset += sent
+            if offset >= size:
+                return 'sendfile'
+        except OSError as e:
+            # sendfile only accepts a regular file as output on Linux
+            if e.errno not in UNSUPPORTED_COPY_ERRORS + (errno.ENOTSOCK,):
+                raise
+
+    os.lseek(source_fd, offset, os.SEEK_SET)
+    os.lseek(destination_fd, offset, os.SEEK_SET)
+    while True:
+        chunk = os.read(source_fd, COPY_BUFFER_SIZE)
+        if not chunk:
+            break
+        view = memoryview(chunk)
+        while view:
+            written = os.write(destination_fd, view)
+            view = view[written:]
+    return 'buffered'
+
+
+def copy_into_place(source_path, destination_path):
+    """
+    Copies a file to a temporary file next to the destination, flushes it to disk and then
+    renames it over the destination, so the destination is always either the old file or the
+    complete new one.
+
+    :param source_path: Path of the file to copy.
+    :param destination_path: Final path of the copy.
+    :return: Name of the copy method used.
+    """
+    temp_path = temp_path_for(destination_path)
+    try:
+        with open(source_path, 'rb') as source, open(temp_path, 'wb') as destination:
+            size = os.fstat(source.fileno()).st_size
+            method = copy_file_data(source.fileno(), destination.fileno(), size)
+            os.fsync(destination.fileno())
+        shutil.copystat(source_path, temp_path)
+        os.replace(temp_path, destination_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return method
+
+
+def link_into_place(source_path, destination_path):
+    """
+    Hardlinks a file to the destination, replacing any existing file atomically.
+
+    :param source_path: Path of the file to link.
+    :param destination_path: Path of the new link.
+    """
+    temp_path = temp_path_for(destination_path)
+    os.link(source_path, temp_path)
+    try:
+        os.replace(temp_path, destination_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def place_rom(source_path, destination_path, keep_source=False):
+    """
+    Puts a ROM at its destination, replacing any ROM already there without ever leaving the
+    destination missing or partly written.
+
+    On the same filesystem the ROM is renamed, or hardlinked when the source is kept. Across
+    filesystems it is copied into a temporary file next to the destination, which is then
+    renamed into place, and the source is removed afterwards unless it is kept.
+
+    :param source_path: Path of the ROM to place.
+    :param destination_path: Path the ROM should end up at.
+    :param keep_source: Leave the source file where it is.
+    :return: PLACED_BY_RENAME, PLACED_BY_HARDLINK or PLACED_BY_COPY.
+    """
+    started = time.perf_counter()
+    destination_dir = os.path.dirname(os.path.abspath(destination_path))
+
+    if os.path.abspath(source_path) == os.path.abspath(destination_path):
+        return PLACED_BY_RENAME
+
+    if is_same_device(source_path, destination_dir):
+        if not keep_source:
+            os.replace(source_path, destination_path)
+            logging.info(f"Moved {source_path} to {destination_path} in {time.perf_counter() - started:.3f}s")
+            return PLACED_BY_RENAME
+        try:
+            link_into_place(source_path, destination_path)
+            logging.info(f"Linked {source_path} to {destination_path}")
+            return PLACED_BY_HARDLINK
+        except OSError as e:
+            # e.g. FAT32 and exFAT drives have no hardlinks
+            logging.debug(f"Cannot hardlink {source_path}, copying instead: {e}")
+
+    method = copy_into_place(source_path, destination_path)
+    if not keep_source:
+        os.remove(source_path)
+    logging.info(f"Copied {source_path} to {destination_path} using {method} in {time.perf_counter() - started:.3f}s")
+    return PLACED_BY_COPY
@@ -0,0 +1,163 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+import pyz3r
+
+from config import (ALTTPR_BASE_URL, ALTTPR_WEBSITE_URL, SEED_BATCH_CONCURRENCY, SEED_BATCH_MAX_RETRIES,
+                    SEED_BATCH_MIN_INTERVAL_SECONDS, SEED_BATCH_RETRY_BACKOFF_SECONDS)
+from utilities.seed_generator import get_seed_request
+
+
+class RateLimiter:
+    """
+    Spaces out calls so that no two start less than min_interval seconds apart.
+    """
+    def __init__(self, min_interval=SEED_BATCH_MIN_INTERVAL_SECONDS):
+        self.min_interval = min_interval
+        self.next_start = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self.lock:
+            now = time.monotonic()
+            if self.next_start > now:
+                await asyncio.sleep(self.next_start - now)
+                now = self.next_start
+            self.next_start = now + self.min_interval
+
+
+def get_permalink(seed_hash, baseurl=ALTTPR_BASE_URL):
+    """
+    Returns the link to share for a seed. Seeds from the public site link to its localized page.
+
+    :param seed_hash: Hash of the seed.
+    :param baseurl: Randomizer host the seed was generated on.
+    :return: Permalink of the seed.
+    """
+    if baseurl == ALTTPR_BASE_URL:
+        return f"{ALTTPR_WEBSITE_URL}/h/{seed_hash}"
+    return f"{baseurl}/h/{seed_hash}"
+
+
+async def generate_batch(seed_requests, baseurl=ALTTPR_BASE_URL, concurrency=SEED_BATCH_CONCURRENCY,
+                         min_interval=SEED_BATCH_MIN_INTERVAL_SECONDS, max_retries=SEED_BATCH_MAX_RETRIES,
+                         retry_backoff=SEED_BATCH_RETRY_BACKOFF_SECONDS, on_result=None):
+    """
+    Generates several seeds for several presets at once.
+
+    At most `concurrency` seeds are generated at the same time and requests start at least
+    `min_interval` seconds apart. A failed seed is retried with exponential backoff; once it
+    runs out of retries it is reported with its error instead of failing the whole batch.
+
+    :param seed_requests: List of (preset name, number of seeds) pairs.
+    :param baseurl: Randomizer host to generate the seeds on.
+    :param concurrency: Number of seeds generated at the same time.
+    :param min_interval: Minimum time between two generate requests in seconds.
+    :param max_retries: Number of retries for each seed.
+    :param retry_backoff: Delay before the first retry in seconds, doubled after each retry.
+    :param on_result: Optional function called with each result dictionary as it finishes.
+    :return: List of result dictionaries in request order.
+    """
+    # Read every preset up front, so a missing or broken preset fails before any seed is rolled
+    prepared = {preset_name: get_seed_request(preset_name) for preset_name, _ in seed_requests}
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = RateLimiter(min_interval)
+
+    async def generate_one(preset_name, index):
+        settings, endpoint = prepared[preset_name]
+        result = {"preset": preset_name, "index": index}
+        async with semaphore:
+            for attempt in range(max_retries + 1):
+                await limiter.wait()
+                try:
+                    seed = await pyz3r.ALTTPR.generate(settings=settings, endpoint=endpoint, baseurl=baseurl)
+                    result.update({
+                        "hash": seed.hash,
+                        "url": seed.url,
+                        "permalink": get_permalink(seed.hash, baseurl),
+                        "attempts": attempt + 1
+                    })
+                    logging.info(f"Generated seed {index + 1} for {preset_name}: {seed.url}")
+                    break
+                except Exception as e:
+                    if attempt == max_retries:
+                        result.update({"error": f"{type(e).__name__}: {e}", "attempts": attempt + 1})
+                        logging.error(f"Failed to generate seed {index + 1} for {preset_name}: {e}")
+                        break
+                    delay = retry_backoff * (2 ** attempt)
+                    logging.warning(f"Seed {index + 1} for {preset_name} failed, retrying in {delay}s: {e}")
+                    await asyncio.sleep(delay)
+
+        if on_result:
+            on_result(result)
+        return result
+
+    started = time.monotonic()
+    results = await asyncio.gather(*(generate_one(preset_name, index)
+                                     for preset_name, count in seed_requests for index in range(count)))
+    failed = sum(1 for result in results if "error" in result)
+    logging.info(f"Generated {len(results) - failed} of {len(results)} seeds in {time.monotonic() - started:.1f}s")
+    return results
+
+
+def write_manifest(manifest_path, results, baseurl=ALTTPR_BASE_URL):
+    """
+    Writes the results of a batch to a JSON manifest, replacing the file atomically.
+
+    :param manifest_path: Path of the manifest file.
+    :param results: Result dictionaries returned by generate_batch.
+    :param baseurl: Randomizer host the seeds were generated on.
+    """
+    manifest = {
+        "generated_at": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "baseurl": baseurl,
+        "seeds": results
+    }
+    temp_path = manifest_path + '.tmp'
+    with open(temp_path, 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+    os.replace(temp_path, manifest_path)
+    logging.info(f"Seed manifest written to {manifest_path}")
+
+
+def parse_seed_request(value):
+    """
+    Parses a 'preset' or 'preset:count' command line argument.
+    """
+    preset_name, _, count = value.partition(':')
+    try:
+        count = int(count) if count else 1
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid seed count in {value!r}")
+    if count < 1:
+        raise argparse.ArgumentTypeError(f"Seed count must be at least 1 in {value!r}")
+    return preset_name, count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m utilities.seed_batch", description="Generate a batch of ALTTPR seeds.")
+    parser.add_argument('seeds', nargs='+', type=parse_seed_request, metavar='PRESET[:COUNT]',
+                        help="Preset name and number of seeds to generate for it")
+    parser.add_argument('-o', '--output', default='seeds.json', help="Manifest file to write")
+    parser.add_argument('--baseurl', default=ALTTPR_BASE_URL, help="Randomizer host")
+    parser.add_argument('--concurrency', type=int, default=SEED_BATCH_CONCURRENCY)
+    parser.add_argument('--min-interval', type=float, default=SEED_BATCH_MIN_INTERVAL_SECONDS)
+    parser.add_argument('--retries', type=int, default=SEED_BATCH_MAX_RETRIES)
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(generate_batch(args.seeds, baseurl=args.baseurl, concurrency=args.concurrency,
+                                         min_interval=args.min_interval, max_retries=args.retries))
+    write_manifest(args.output, results, args.baseurl)
+    for result in results:
+        print(f"{result['preset']} #{result['index'] + 1}: {result.get('permalink', result.get('error'))}")
+    return 1 if any("error" in result for result in results) else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s:%(levelname)s:%(message)s')
+    sys.exit(main())
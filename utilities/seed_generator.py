@@ -1,45 +1,36 @@
 import asyncio
-import os
 import pyz3r
 import json
-import yaml
 import logging
 
-from config import PRESETS_DIR
+from config import ALTTPR_BASE_URL
+from utilities.preset_registry import preset_registry
 
 # Function to read and parse the YAML preset file
 def get_yaml_presets():
     """
-    Iterates through the presets directory and returns a list of all the 'goal_name' fields within each file.
+    Returns the names of all presets in the presets directory.
 
-    :return: List of preset goals.
+    :return: Sorted list of preset names.
     """
     logging.info("Fetching goals from YAML presets")
-    presets = []
-    for file in os.listdir(PRESETS_DIR):
-        if file.endswith('.yaml') or file.endswith('.yml'):
-            file_name, ext = os.path.splitext(file)
-            presets.append(file_name)
-    presets.sort()
-    logging.info(f"Found {len(presets)} presets")
-    return presets
+    return preset_registry.names()
 
 def read_yaml_preset(preset_name):
-    for file in os.listdir(PRESETS_DIR):
-        file_name, ext = os.path.splitext(file)
-        if file_name == preset_name:
-            file_path = os.path.join(PRESETS_DIR, file)
-            with open(file_path, 'r') as preset_file:
-                yaml_content = yaml.safe_load(preset_file)
+    """
+    Returns the parsed contents of a preset. The result is cached and must not be modified.
 
-            return yaml_content
+    :param preset_name: Name of the preset.
+    :return: Parsed preset, or None if there is no such preset.
+    """
+    return preset_registry.load(preset_name)
 
 # Function to convert the YAML content to a settings dictionary
 def convert_yaml_to_settings(yaml_content):
     settings = yaml_content.get('settings', {})
     # Add custom logic here to transform the YAML settings
     
-    print(settings)
+    logging.debug(f"Preset settings: {settings}")
     #settings["mode"] = "race"
 
     return settings
@@ -49,10 +40,18 @@ def convert_settings_to_json_and_back(settings_dict):
     json_string = json.dumps(settings_dict)
     return json.loads(json_string)
 
-# Async function to generate the ALTTPR seed
-async def generate_alttpr_seed(preset_name):
+# Function to build the settings and endpoint used to generate a seed for a preset
+def get_seed_request(preset_name):
+    """
+    Reads a preset and returns what needs to be sent to the randomizer API for it.
+
+    :param preset_name: Name of the preset.
+    :return: Tuple of (settings dictionary, API endpoint).
+    """
     # Read and parse the YAML preset file
     preset_content = read_yaml_preset(preset_name)
+    if preset_content is None:
+        raise ValueError(f"Preset not found: {preset_name}")
 
     # Convert YAML content to settings dictionary
     settings_dict = convert_yaml_to_settings(preset_content)
@@ -60,19 +59,23 @@ async def generate_alttpr_seed(preset_name):
     # Convert settings dictionary to JSON and back to dictionary
     settings_for_customizer = convert_settings_to_json_and_back(settings_dict)
 
-    # print(settings_for_customizer)
-
     # Determine the endpoint
     endpoint = '/api/customizer' if preset_content.get('customizer', False) else '/api/randomizer'
 
+    return settings_for_customizer, endpoint
+
+# Async function to generate the ALTTPR seed
+async def generate_alttpr_seed(preset_name, baseurl=ALTTPR_BASE_URL):
+    settings_for_customizer, endpoint = get_seed_request(preset_name)
+
     # Generate the seed using pyz3r with the customizer settings
-    seed = await pyz3r.ALTTPR.generate(settings=settings_for_customizer, endpoint=endpoint)
+    seed = await pyz3r.ALTTPR.generate(settings=settings_for_customizer, endpoint=endpoint, baseurl=baseurl)
 
     return seed
 
 # Main function to run the async function
-async def main_generate(preset_name):
-    seed = await generate_alttpr_seed(preset_name)
+async def main_generate(preset_name, baseurl=ALTTPR_BASE_URL):
+    seed = await generate_alttpr_seed(preset_name, baseurl=baseurl)
     return seed
 
 if __name__ == "__main__":
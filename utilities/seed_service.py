@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import threading
+
+from config import SEED_RESULT_POLL_INTERVAL_MS
+from utilities.seed_batch import generate_batch
+from utilities.seed_generator import main_generate
+
+
+class SeedService:
+    """
+    Runs seed generation on one long-lived asyncio event loop in a background thread, so
+    requests never block the Tk main loop and several can be in flight at once.
+    """
+    def __init__(self):
+        self.loop = None
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        """Start the event loop thread if it is not running yet."""
+        with self.lock:
+            if self.thread and self.thread.is_alive():
+                return
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(target=self.run, name="seed-service", daemon=True)
+            self.thread.start()
+        logging.info("Seed service started")
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def stop(self):
+        """Cancel outstanding requests and stop the event loop thread."""
+        with self.lock:
+            loop, thread = self.loop, self.thread
+            self.loop = self.thread = None
+        if not loop:
+            return
+
+        async def shutdown():
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            loop.stop()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), loop)
+        thread.join(timeout=5)
+        if not thread.is_alive():
+            loop.close()
+        logging.info("Seed service stopped")
+
+    def submit(self, coro):
+        """
+        Schedule a coroutine on the service loop.
+
+        :param coro: Coroutine to run.
+        :return: concurrent.futures.Future with the coroutine's result.
+        """
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def generate(self, preset_name):
+        """
+        Request a seed for a preset.
+
+        :param preset_name: Name of the preset.
+        :return: concurrent.futures.Future resolving to the pyz3r seed.
+        """
+        logging.info(f"Seed requested for preset {preset_name}")
+        return self.submit(main_generate(preset_name))
+
+    def generate_batch(self, seed_requests, **kwargs):
+        """
+        Request several seeds for several presets.
+
+        :param seed_requests: List of (preset name, number of seeds) pairs.
+        :return: concurrent.futures.Future resolving to the list of batch results.
+        """
+        logging.info(f"Seed batch requested: {seed_requests}")
+        return self.submit(generate_batch(seed_requests, **kwargs))
+
+    @staticmethod
+    def deliver(widget, future, on_success, on_error=None, interval=SEED_RESULT_POLL_INTERVAL_MS):
+        """
+        Call back on the Tk main thread once a future finishes. The future is polled with
+        widget.after, since Tk must not be touched from the service thread.
+
+        :param widget: Any Tk widget, used to schedule the polling.
+        :param future: Future returned by submit or generate.
+        :param on_success: Function called with the result.
+        :param on_error: Optional function called with the exception instead.
+        :param interval: Polling interval in milliseconds.
+        """
+        def check():
+            if not future.done():
+                widget.after(interval, check)
+                return
+            try:
+                result = future.result()
+            except BaseException as e:
+                if on_error:
+                    on_error(e)
+                else:
+                    logging.error(f"Seed request failed: {e}")
+                return
+            on_success(result)
+
+        widget.after(interval, check)
@@ -0,0 +1,265 @@
+import bz2
+import logging
+import os
+import shutil
+import struct
+import zlib
+
+from utilities.log_setup import RATE_LIMITED
+
+LOCAL_FILE_HEADER = b'PK\x03\x04'
+CENTRAL_DIRECTORY_HEADER = b'PK\x01\x02'
+END_OF_CENTRAL_DIRECTORY = b'PK\x05\x06'
+ZIP64_END_OF_CENTRAL_DIRECTORY = b'PK\x06\x06'
+DATA_DESCRIPTOR = b'PK\x07\x08'
+
+LOCAL_HEADER_FORMAT = '<4sHHHHHIIIHH'
+LOCAL_HEADER_SIZE = struct.calcsize(LOCAL_HEADER_FORMAT)
+
+FLAG_ENCRYPTED = 0x01
+FLAG_DATA_DESCRIPTOR = 0x08
+
+METHOD_STORED = 0
+METHOD_DEFLATED = 8
+METHOD_BZIP2 = 12
+
+ZIP64_EXTRA_ID = 0x0001
+ZIP64_LIMIT = 0xFFFFFFFF
+
+# Metadata folders added by macOS archivers, never part of an MSU pack
+SKIPPED_PREFIXES = ('__MACOSX/',)
+
+
+class StreamingNotSupported(Exception):
+    """Raised when an archive uses a layout that cannot be extracted from a forward-only stream."""
+
+
+def safe_member_path(extract_to, member_name):
+    """
+    Resolves an archive member name to a path inside extract_to, dropping drive letters,
+    absolute prefixes and '..' components the same way zipfile.extractall does.
+
+    :param extract_to: Directory the archive is extracted into.
+    :param member_name: Name of the member inside the archive.
+    :return: Path to write the member to, or None if nothing is left of the name.
+    """
+    name = os.path.splitdrive(member_name.replace('\\', '/'))[1]
+    parts = [part for part in name.split('/') if part not in ('', '.', '..')]
+    if not parts:
+        return None
+    return os.path.join(extract_to, *parts)
+
+
+class StreamingZipExtractor:
+    """
+    Extracts a zip archive from a forward-only byte stream by walking its local file headers,
+    so entries are decompressed and written while the archive is still downloading.
+
+    Feed it the archive bytes in order with feed() and call close() once the stream ends.
+    Entries must be stored, deflated or bzip2-compressed and not encrypted; anything else
+    raises StreamingNotSupported so the caller can fall back to a regular download.
+    """
+    def __init__(self, extract_to):
+        self.extract_to = extract_to
+        self.buffer = bytearray()
+        self.entry = None
+        self.finished = False
+        self.bytes_written = 0
+        self.written_paths = []
+
+    def feed(self, data):
+        """
+        Processes the next bytes of the archive.
+
+        :param data: Bytes following those passed to the previous call.
+        """
+        if self.finished:
+            return
+        self.buffer += data
+        while not self.finished and self._step():
+            pass
+
+    def close(self):
+        """
+        Finishes extraction, failing if the stream ended in the middle of an entry.
+        """
+        if self.entry is not None:
+            self._close_entry_file()
+            raise IOError(f"Zip stream ended in the middle of {self.entry['name']}")
+        if not self.finished and self.buffer:
+            raise IOError("Zip stream ended in the middle of a local file header")
+        logging.info(f"Streamed {self.bytes_written} bytes of extracted files into {self.extract_to}")
+
+    def cleanup(self):
+        """
+        Removes everything written so far, used before falling back to a regular download.
+        """
+        if self.entry is not None:
+            self._close_entry_file()
+            self.entry = None
+        for path in reversed(self.written_paths):
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif os.path.exists(path):
+                os.remove(path)
+        self.written_paths = []
+
+    def _step(self):
+        """
+        Advances the state machine by one step.
+
+        :return: True if progress was made and another step may succeed.
+        """
+        if self.entry is None:
+            return self._read_header()
+        return self._read_entry_data()
+
+    def _read_header(self):
+        if len(self.buffer) < 4:
+            return False
+
+        signature = bytes(self.buffer[:4])
+        if signature in (CENTRAL_DIRECTORY_HEADER, END_OF_CENTRAL_DIRECTORY, ZIP64_END_OF_CENTRAL_DIRECTORY):
+            # Every entry has been read, the rest of the file is only the index
+            self.finished = True
+            self.buffer = bytearray()
+            return False
+        if signature != LOCAL_FILE_HEADER:
+            raise StreamingNotSupported(f"Unexpected zip record signature {signature!r}")
+        if len(self.buffer) < LOCAL_HEADER_SIZE:
+            return False
+
+        (_, _, flags, method, _, _, crc, compressed_size, uncompressed_size,
+         name_length, extra_length) = struct.unpack(LOCAL_HEADER_FORMAT, self.buffer[:LOCAL_HEADER_SIZE])
+        header_end = LOCAL_HEADER_SIZE + name_length + extra_length
+        if len(self.buffer) < header_end:
+            return False
+
+        name_bytes = bytes(self.buffer[LOCAL_HEADER_SIZE:LOCAL_HEADER_SIZE + name_length])
+        extra = bytes(self.buffer[LOCAL_HEADER_SIZE + name_length:header_end])
+        del self.buffer[:header_end]
+
+        # Bit 11 marks UTF-8 names, otherwise the zip spec uses code page 437
+        name = name_bytes.decode('utf-8' if flags & 0x800 else 'cp437')
+        zip64 = compressed_size == ZIP64_LIMIT or uncompressed_size == ZIP64_LIMIT
+        if zip64:
+            compressed_size, uncompressed_size = self._read_zip64_sizes(extra, compressed_size, uncompressed_size)
+
+        if flags & FLAG_ENCRYPTED:
+            raise StreamingNotSupported(f"{name} is encrypted")
+        if method not in (METHOD_STORED, METHOD_DEFLATED, METHOD_BZIP2):
+            raise StreamingNotSupported(f"{name} uses unsupported compression method {method}")
+        has_descriptor = bool(flags & FLAG_DATA_DESCRIPTOR)
+        if has_descriptor and method == METHOD_STORED:
+            raise StreamingNotSupported(f"{name} is stored without a known size")
+
+        self.entry = {
+            "name": name,
+            "method": method,
+            "crc": crc,
+            "compressed_size": compressed_size,
+            "has_descriptor": has_descriptor,
+            "zip64": zip64 or any(extra_id == ZIP64_EXTRA_ID for extra_id, _ in self._iter_extra(extra)),
+            "remaining": None if has_descriptor else compressed_size,
+            "running_crc": 0,
+            "file": None,
+            "decompressor": None
+        }
+        self._open_entry_file()
+        return True
+
+    def _iter_extra(self, extra):
+        offset = 0
+        while offset + 4 <= len(extra):
+            extra_id, size = struct.unpack('<HH', extra[offset:offset + 4])
+            yield extra_id, extra[offset + 4:offset + 4 + size]
+            offset += 4 + size
+
+    def _read_zip64_sizes(self, extra, compressed_size, uncompressed_size):
+        for extra_id, data in self._iter_extra(extra):
+            if extra_id != ZIP64_EXTRA_ID:
+                continue
+            values = list(struct.unpack(f'<{len(data) // 8}Q', data[:len(data) // 8 * 8]))
+            if uncompressed_size == ZIP64_LIMIT and values:
+                uncompressed_size = values.pop(0)
+            if compressed_size == ZIP64_LIMIT and values:
+                compressed_size = values.pop(0)
+        return compressed_size, uncompressed_size
+
+    def _open_entry_file(self):
+        entry = self.entry
+        path = None if entry["name"].startswith(SKIPPED_PREFIXES) else safe_member_path(self.extract_to, entry["name"])
+        if path is None or entry["name"].endswith('/'):
+            if path is not None and not os.path.isdir(path):
+                os.makedirs(path, exist_ok=True)
+                self.written_paths.append(path)
+            entry["path"] = None
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            entry["file"] = open(path, 'wb')
+            entry["path"] = path
+            self.written_paths.append(path)
+
+        if entry["method"] == METHOD_DEFLATED:
+            entry["decompressor"] = zlib.decompressobj(-zlib.MAX_WBITS)
+        elif entry["method"] == METHOD_BZIP2:
+            entry["decompressor"] = bz2.BZ2Decompressor()
+
+    def _close_entry_file(self):
+        if self.entry and self.entry["file"]:
+            self.entry["file"].close()
+            self.entry["file"] = None
+
+    def _write(self, data):
+        if not data:
+            return
+        self.entry["running_crc"] = zlib.crc32(data, self.entry["running_crc"])
+        if self.entry["file"]:
+            self.entry["file"].write(data)
+            self.bytes_written += len(data)
+
+    def _read_entry_data(self):
+        entry = self.entry
+        if entry["remaining"] is not None:
+            if entry["remaining"] and not self.buffer:
+                return False
+            chunk = bytes(self.buffer[:entry["remaining"]])
+            del self.buffer[:len(chunk)]
+            entry["remaining"] -= len(chunk)
+            self._write(entry["decompressor"].decompress(chunk) if entry["decompressor"] else chunk)
+            if entry["remaining"]:
+                return False
+            return self._finish_entry(entry["crc"])
+
+        # Size unknown until the compressed stream reports its own end
+        if not entry["decompressor"].eof:
+            if not self.buffer:
+                return False
+            chunk = bytes(self.buffer)
+            self.buffer = bytearray()
+            self._write(entry["decompressor"].decompress(chunk))
+            if not entry["decompressor"].eof:
+                return False
+            self.buffer = bytearray(entry["decompressor"].unused_data)
+
+        size_length = 8 if entry["zip64"] else 4
+        descriptor_length = 4 + 2 * size_length
+        if len(self.buffer) < 4:
+            return False
+        if bytes(self.buffer[:4]) == DATA_DESCRIPTOR:
+            descriptor_length += 4
+        if len(self.buffer) < descriptor_length:
+            return False
+        crc = struct.unpack('<I', self.buffer[descriptor_length - 4 - 2 * size_length:descriptor_length - 2 * size_length])[0]
+        del self.buffer[:descriptor_length]
+        return self._finish_entry(crc)
+
+    def _finish_entry(self, expected_crc):
+        entry = self.entry
+        self._close_entry_file()
+        self.entry = None
+        if entry["path"] and entry["running_crc"] != expected_crc:
+            raise IOError(f"CRC mismatch in {entry['name']}")
+        if entry["path"]:
+            logging.debug(f"Extracted {entry['name']} from stream", extra=RATE_LIMITED)
+        return True